@@ -15,29 +15,55 @@
 # implied.  See the License for the specific language governing
 # permissions and limitations under the License.
 
+import asyncio
+import cProfile
+import inspect
+import io
+import json
+import multiprocessing
+import numbers
+import os
+import pickle
+import pstats
+import queue
 import random
 import statistics
 import sys
+import threading
 import time
+import traceback
+import tracemalloc
+from array import array
 from bisect import bisect_left
+from collections import OrderedDict
+from collections import deque
+from concurrent.futures import Executor
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from copy import copy
 from enum import Enum
 from enum import IntEnum
+from functools import partial
+from itertools import islice
 from math import exp
+from math import log
+from math import sqrt
 
 
-def _generate_parent(length, geneSet, get_fitness):
+def _generate_parent(length, geneSet, get_fitness, rng=random):
     genes = []
     while len(genes) < length:
         sampleSize = min(length - len(genes), len(geneSet))
-        genes.extend(random.sample(geneSet, sampleSize))
+        genes.extend(rng.sample(geneSet, sampleSize))
     fitness = get_fitness(genes)
     return Chromosome(genes, fitness, Strategies.Create)
 
 
-def _mutate(parent, geneSet, get_fitness):
+def _mutate(parent, geneSet, get_fitness, rng=random):
     childGenes = parent.Genes[:]
-    index = random.randrange(0, len(parent.Genes))
-    newGene, alternate = random.sample(geneSet, 2)
+    index = rng.randrange(0, len(parent.Genes))
+    newGene, alternate = rng.sample(geneSet, 2)
     childGenes[index] = alternate if newGene == childGenes[index] else newGene
     fitness = get_fitness(childGenes)
     return Chromosome(childGenes, fitness, Strategies.Mutate)
@@ -50,15 +76,111 @@ def _mutate_custom(parent, custom_mutate, get_fitness):
     return Chromosome(childGenes, fitness, Strategies.Mutate)
 
 
+def _mutate_tracked(parent, geneSet, get_fitness, inPlace, rng=random):
+    genes = parent.Genes if inPlace else parent.Genes[:]
+    index = rng.randrange(0, len(genes))
+    oldGene = genes[index]
+    newGene, alternate = rng.sample(geneSet, 2)
+    genes[index] = alternate if newGene == oldGene else newGene
+    changes = [(index, oldGene)]
+    try:
+        fitness = get_fitness(parent, genes, changes)
+    except _BudgetExhausted:
+        _rollback(genes, changes, inPlace)
+        raise
+    child = Chromosome(genes, fitness, Strategies.Mutate)
+    if inPlace:
+        child.UndoLog = changes
+    return child
+
+
+def _mutate_custom_tracked(parent, custom_mutate, get_fitness, inPlace):
+    # custom_mutate must append (index, oldGene) to changes for every gene
+    # it replaces and must not change the length of genes
+    genes = parent.Genes if inPlace else parent.Genes[:]
+    changes = []
+    try:
+        custom_mutate(genes, changes)
+        fitness = get_fitness(parent, genes, changes)
+    except _BudgetExhausted:
+        _rollback(genes, changes, inPlace)
+        raise
+    child = Chromosome(genes, fitness, Strategies.Mutate)
+    if inPlace:
+        child.UndoLog = changes
+    return child
+
+
+def _mutate_batch(parents, geneArray, get_fitness_batch, generator):
+    import numpy
+    genes = numpy.array([p.Genes for p in parents])
+    _mutate_rows(genes, geneArray, generator)
+    fitnesses = _to_list(get_fitness_batch(genes))
+    return [Chromosome(childGenes, fitness, Strategies.Mutate)
+            for childGenes, fitness in zip(genes.tolist(), fitnesses)]
+
+
+def _mutate_rows(genes, geneArray, generator):
+    # replaces one gene in each row with a different gene from the set
+    import numpy
+    rows = numpy.arange(len(genes))
+    indexes = generator.integers(0, genes.shape[1], len(genes))
+    newGenes = generator.integers(0, len(geneArray), len(genes))
+    alternates = (newGenes + generator.integers(1, len(geneArray),
+                                                len(genes))) % len(geneArray)
+    newGenes = geneArray[newGenes]
+    alternates = geneArray[alternates]
+    genes[rows, indexes] = numpy.where(newGenes == genes[rows, indexes],
+                                       alternates, newGenes)
+
+
+def _score_batch(children, get_fitness_batch):
+    import numpy
+    unscored = [c for c in children if c.Fitness is None]
+    if len(unscored) == 0:
+        return
+    fitnesses = get_fitness_batch(numpy.array([c.Genes for c in unscored]))
+    for child, fitness in zip(unscored, _to_list(fitnesses)):
+        child.Fitness = fitness
+
+
+def _to_list(fitnesses):
+    # plain Python numbers compare faster than NumPy scalars
+    return fitnesses.tolist() if hasattr(fitnesses, 'tolist') else fitnesses
+
+
+def _keep(child):
+    if child.UndoLog is not None:
+        child.Genes = child.Genes[:]
+    return child
+
+
+def _undo(parent, child):
+    if child.UndoLog is None:
+        return
+    for index, gene in reversed(child.UndoLog):
+        parent.Genes[index] = gene
+    child.UndoLog = None
+
+
+def _rollback(genes, changes, inPlace):
+    # the parent keeps its genes when the search stops mid mutation
+    if inPlace:
+        for index, gene in reversed(changes):
+            genes[index] = gene
+
+
 def _crossover(parentGenes, index, parents, get_fitness, crossover, mutate,
-               generate_parent):
-    donorIndex = random.randrange(0, len(parents))
+               generate_parent, rng=random, genomeIndex=None):
+    donorIndex = rng.randrange(0, len(parents))
     if donorIndex == index:
         donorIndex = (donorIndex + 1) % len(parents)
     childGenes = crossover(parentGenes, parents[donorIndex].Genes)
     if childGenes is None:
         # parent and donor are indistinguishable
         parents[donorIndex] = generate_parent()
+        if genomeIndex is not None:
+            genomeIndex.replace(donorIndex, parents[donorIndex])
         return mutate(parents[index])
     fitness = get_fitness(childGenes)
     return Chromosome(childGenes, fitness, Strategies.Crossover)
@@ -66,145 +188,1200 @@ def _crossover(parentGenes, index, parents, get_fitness, crossover, mutate,
 
 def get_best(get_fitness, targetLen, optimalFitness, geneSet, display,
              custom_mutate=None, custom_create=None, maxAge=None,
-             poolSize=1, crossover=None, maxSeconds=None):
-    if custom_mutate is None:
-        def fnMutate(parent):
-            return _mutate(parent, geneSet, get_fitness)
+             poolSize=1, crossover=None, maxSeconds=None, deadline=None,
+             seed=None, fitnessCache=None, fitness_key=None,
+             mutateInPlace=False, get_fitness_delta=None,
+             get_fitness_batch=None, geneTypeCode=None,
+             rejectDuplicates=False, duplicateRetries=3, generational=None,
+             scheduling=None, restarts=None, budget=None, parallel=None,
+             checkpoints=None, instrumentation=None):
+    rng = _get_random(seed)
+    deadline = Deadline(maxSeconds, deadline)
+    parallel = parallel or Parallel()
+    instrumentation = instrumentation or Instrumentation()
+    stats = instrumentation.Stats
+    scheduling = scheduling or Scheduling()
+    if scheduling.Cost is None:
+        # timings differ between runs so seeded runs count uses
+        scheduling = Scheduling(scheduling.Window, scheduling.Selection,
+                                StrategyCost.Uses if seed is not None
+                                else StrategyCost.Seconds)
+    searchBudget = None if budget is None else \
+        _SearchBudget(budget, poolSize)
+    fitness = _wrap_fitness(get_fitness, get_fitness_delta,
+                            get_fitness_batch, deadline, fitness_key,
+                            searchBudget, stats, fitnessCache)
+    backgroundDisplay = None
+    if instrumentation.DisplayInterval is not None:
+        # the search only hands improvements over, a thread shows the
+        # latest one once per interval
+        backgroundDisplay = _BackgroundDisplay(
+            display, instrumentation.DisplayInterval)
+        display = backgroundDisplay.show
+    restore = _identity
+    if fitness_key is not None:
+        # the engine compares plain keys, display and the caller get the
+        # fitness objects back
+        restore = _restore_fitness
+        optimalFitness = fitness_key(optimalFitness)
+        fnDisplay = display
+
+        def display(candidate):
+            fnDisplay(restore(candidate))
+
+    custom_mutate, custom_create, crossover, display = _wrap_callbacks(
+        custom_mutate, custom_create, crossover, display, deadline,
+        fitness.get_fitness)
+    settings = _Settings(rng, mutateInPlace, geneTypeCode, rejectDuplicates,
+                         duplicateRetries, generational, scheduling,
+                         restarts, checkpoints, stats, searchBudget)
+    if stats is not None:
+        stats.start()
+    randomState = _seed_random(rng)
+    try:
+        if parallel.Islands is not None and parallel.Islands > 1:
+            best = _get_best_islands(fitness, targetLen, optimalFitness,
+                                     geneSet, display, custom_mutate,
+                                     custom_create, maxAge, poolSize,
+                                     crossover, deadline, settings,
+                                     parallel)
+        elif fitness.get_fitness_batch is not None:
+            best = _get_best_batch(fitness, targetLen, optimalFitness,
+                                   geneSet, display, custom_mutate,
+                                   custom_create, maxAge, poolSize,
+                                   crossover, deadline, settings,
+                                   parallel.BatchSize or max(100, poolSize))
+        elif parallel.Workers is None or \
+                not isinstance(parallel.Workers, Executor) and \
+                parallel.Workers < 2:
+            best = _get_best(fitness, targetLen, optimalFitness, geneSet,
+                             display, custom_mutate, custom_create, maxAge,
+                             poolSize, crossover, deadline, settings)
+        else:
+            best = _get_best_parallel(fitness, targetLen, optimalFitness,
+                                      geneSet, display, custom_mutate,
+                                      custom_create, maxAge, poolSize,
+                                      crossover, deadline, settings,
+                                      parallel, fitnessCache)
+    finally:
+        _restore_random(randomState)
+        if backgroundDisplay is not None:
+            # the last improvement is shown before get_best returns
+            backgroundDisplay.close()
+    if backgroundDisplay is not None:
+        # raised here so it does not replace an error from the search
+        backgroundDisplay.raise_error()
+    return restore(best)
+
+
+class _Fitness:
+    def __init__(self, get_fitness, get_bounded_fitness, get_fitness_delta,
+                 get_fitness_batch, get_unobserved_fitness):
+        self.get_fitness = get_fitness
+        self.get_bounded_fitness = get_bounded_fitness
+        self.get_fitness_delta = get_fitness_delta
+        self.get_fitness_batch = get_fitness_batch
+        self.get_unobserved_fitness = get_unobserved_fitness
+
+
+def _wrap_fitness(get_fitness, get_fitness_delta, get_fitness_batch,
+                  deadline, fitness_key, searchBudget, stats, fitnessCache):
+    # the wrappers are applied from the inside out, each one sees what the
+    # ones before it return:
+    #   1. functions that declare a deadline parameter get the run's
+    #   2. fitness_key turns the caller's fitness into a comparable key
+    #   3. the search budget refuses an evaluation before it is made
+    #   4. the module's evaluation counter and profiler
+    #   5. stats count and time the evaluations that were made
+    #   6. a single genome is scored through the batch function if that is
+    #      the only one given
+    #   7. the cache is outermost so a hit costs no budget and is not
+    #      counted as an evaluation
+    # executor threads evaluate the function as it is after step 3, the
+    # search thread counts and times them in steps 4 and 5
+    get_fitness = _pass_deadline(get_fitness, deadline)
+    get_fitness_delta = _pass_deadline(get_fitness_delta, deadline)
+    if fitness_key is not None:
+        get_fitness = _key_fitness(fitness_key, get_fitness)
+        get_fitness_batch = _key_fitness_batch(fitness_key, get_fitness_batch)
+        get_fitness_delta = _key_fitness_delta(fitness_key,
+                                               get_fitness_delta)
+    # bounds are fitnesses, not keys, so fitness_key hides the parameter
+    get_bounded_fitness = get_fitness \
+        if _has_parameter(get_fitness, 'bound') else None
+    if searchBudget is not None:
+        get_fitness = searchBudget.wrap(get_fitness)
+        get_bounded_fitness = searchBudget.wrap(get_bounded_fitness)
+        get_fitness_delta = searchBudget.wrap(get_fitness_delta)
+        get_fitness_batch = searchBudget.wrap_batch(get_fitness_batch)
+    get_unobserved_fitness = get_fitness
+    if _evaluationCounter is not None:
+        get_fitness = _evaluationCounter.wrap(get_fitness)
+        get_bounded_fitness = _evaluationCounter.wrap(get_bounded_fitness)
+        get_fitness_batch = _evaluationCounter.wrap_batch(get_fitness_batch)
+    if _profiler is not None:
+        get_fitness = _profiler.wrap('fitness', get_fitness)
+        get_bounded_fitness = _profiler.wrap('fitness', get_bounded_fitness)
+        get_fitness_delta = _profiler.wrap('fitness', get_fitness_delta)
+        get_fitness_batch = _profiler.wrap('fitness', get_fitness_batch)
+    if stats is not None:
+        get_fitness = stats.wrap(get_fitness)
+        get_bounded_fitness = stats.wrap_call(get_bounded_fitness)
+        get_fitness_delta = stats.wrap_call(get_fitness_delta)
+        get_fitness_batch = stats.wrap_batch(get_fitness_batch)
+    if get_fitness_batch is not None and get_fitness is None:
+        import numpy
+
+        def get_fitness(genes):
+            return _to_list(get_fitness_batch(numpy.array([genes])))[0]
+    if fitnessCache is not None:
+        get_fitness = fitnessCache.wrap(get_fitness)
+    return _Fitness(get_fitness, get_bounded_fitness, get_fitness_delta,
+                    get_fitness_batch, get_unobserved_fitness)
+
+
+def _wrap_callbacks(custom_mutate, custom_create, crossover, display,
+                    deadline, get_fitness):
+    # operators that score genes themselves declare a get_fitness parameter
+    # so their evaluations go through the same wrappers, then the profiler
+    # times the callbacks
+    def fnWrap(fn, name):
+        fn = _pass_fitness(_pass_deadline(fn, deadline), get_fitness)
+        return fn if _profiler is None else _profiler.wrap(name, fn)
+
+    if isinstance(custom_mutate, (list, tuple)):
+        custom_mutate = [fnWrap(m, 'mutate') for m in custom_mutate]
+    else:
+        custom_mutate = fnWrap(custom_mutate, 'mutate')
+    if _profiler is not None:
+        display = _profiler.wrap('display', display)
+    return custom_mutate, fnWrap(custom_create, 'create'), \
+        fnWrap(crossover, 'crossover'), display
+
+
+class _Settings:
+    # what get_best resolved from its arguments, passed unchanged to every
+    # search path
+    def __init__(self, rng, mutateInPlace, geneTypeCode, rejectDuplicates,
+                 duplicateRetries, generational, scheduling, restarts,
+                 checkpoints, stats, searchBudget):
+        self.Rng = rng
+        self.MutateInPlace = mutateInPlace
+        self.GeneTypeCode = geneTypeCode
+        self.RejectDuplicates = rejectDuplicates
+        self.DuplicateRetries = duplicateRetries
+        self.Generational = generational
+        self.Scheduling = scheduling
+        self.Restarts = restarts
+        self.Checkpoints = checkpoints
+        self.Stats = stats
+        self.SearchBudget = searchBudget
+
+
+def _get_best_parallel(fitness, targetLen, optimalFitness, geneSet,
+                       display, custom_mutate, custom_create, maxAge,
+                       poolSize, crossover, deadline, settings, parallel,
+                       fitnessCache):
+    workers = parallel.Workers
+    batchSize = parallel.BatchSize
+    if isinstance(workers, Executor):
+        # the cache and the counters are only used from this thread
+        context = nullcontext(workers)
+        evaluate = fitness.get_unobserved_fitness
+        batchSize = batchSize or max(2, poolSize)
+        chunkSize = 1
+    else:
+        context = _create_executor(workers, fitness.get_fitness)
+        evaluate = _evaluate_in_worker
+        batchSize = batchSize or max(workers, poolSize)
+        chunkSize = max(1, batchSize // workers)
+    with context as executor:
+        stats = settings.Stats
+        searchBudget = settings.SearchBudget
+
+        def fnScoreChildren(children):
+            startTime = time.perf_counter()
+            unscored = []
+            for child in children:
+                if child.Fitness is None and fitnessCache is not None:
+                    child.Fitness = fitnessCache.get(child.Genes)
+                if child.Fitness is None:
+                    unscored.append(child)
+            if searchBudget is not None and evaluate is _evaluate_in_worker:
+                # the workers' copies of the budget do not see each other
+                first = searchBudget.spend(len(unscored))
+            fitnesses = list(executor.map(evaluate,
+                                          [c.Genes for c in unscored],
+                                          chunksize=chunkSize))
+            if searchBudget is not None and evaluate is _evaluate_in_worker:
+                searchBudget.record(first, fitnesses)
+            for child, fitness in zip(unscored, fitnesses):
+                child.Fitness = fitness
+                if fitnessCache is not None:
+                    fitnessCache.add(child.Genes, fitness)
+            if _evaluationCounter is not None:
+                _evaluationCounter.Count += len(unscored)
+            if stats is not None:
+                stats.fitness_evaluated(len(unscored),
+                                        time.perf_counter() - startTime)
+
+        return _get_best(fitness, targetLen, optimalFitness, geneSet,
+                         display, custom_mutate, custom_create, maxAge,
+                         poolSize, crossover, deadline, settings,
+                         fnScoreChildren, batchSize)
+
+
+async def get_best_async(get_fitness, targetLen, optimalFitness, geneSet,
+                         display, concurrency=10, **options):
+    loop = asyncio.get_running_loop()
+    deadline = Deadline(options.pop('maxSeconds', None),
+                        options.pop('deadline', None))
+    get_fitness = _pass_deadline(get_fitness, deadline)
+
+    # the search runs on its own thread, each evaluation thread waits for
+    # one fitness coroutine on this loop
+    def fnGetFitness(genes):
+        return asyncio.run_coroutine_threadsafe(get_fitness(genes),
+                                                loop).result()
+
+    parallel = options.pop('parallel', None) or Parallel()
+    with ThreadPoolExecutor(concurrency) as executor:
+        search = loop.run_in_executor(None, partial(
+            get_best, fnGetFitness, targetLen, optimalFitness, geneSet,
+            display, deadline=deadline,
+            parallel=Parallel(executor,
+                              batchSize=parallel.BatchSize or concurrency),
+            **options))
+        try:
+            return await asyncio.shield(search)
+        except asyncio.CancelledError:
+            # let the search stop before the executor waits for its threads
+            deadline.cancel()
+            await search
+            raise
+
+
+def _identity(x):
+    return x
+
+
+def _key_fitness(fitness_key, get_fitness):
+    if get_fitness is None:
+        return None
+    return lambda genes: _get_key(fitness_key, get_fitness(genes))
+
+
+def _key_fitness_batch(fitness_key, get_fitness_batch):
+    if get_fitness_batch is None:
+        return None
+    return lambda genes: [_get_key(fitness_key, f)
+                          for f in _to_list(get_fitness_batch(genes))]
+
+
+def _key_fitness_delta(fitness_key, get_fitness_delta):
+    if get_fitness_delta is None:
+        return None
+
+    def fnGetFitnessDelta(parent, genes, changes):
+        # the delta is applied to the parent's fitness object
+        parent = Chromosome(parent.Genes, parent.Fitness.Fitness,
+                            parent.Strategy)
+        return _get_key(fitness_key,
+                        get_fitness_delta(parent, genes, changes))
+
+    return fnGetFitnessDelta
+
+
+def _get_key(fitness_key, fitness):
+    # the key carries the fitness object it was made from so the object
+    # does not have to be computed again
+    key = fitness_key(fitness)
+    if isinstance(key, tuple):
+        key = _TupleKey(key)
+    elif isinstance(key, numbers.Integral):
+        key = _IntKey(key)
+    elif isinstance(key, numbers.Real):
+        key = _FloatKey(key)
     else:
+        raise TypeError("fitness_key must return a tuple or a number, not "
+                        "{}".format(type(key).__name__))
+    key.Fitness = fitness
+    return key
+
+
+class _TupleKey(tuple):
+    pass
+
+
+class _IntKey(int):
+    pass
+
+
+class _FloatKey(float):
+    __slots__ = ('Fitness',)
+
+
+def _restore_fitness(chromosome):
+    if chromosome is None:
+        return None
+    restored = Chromosome(chromosome.Genes[:], chromosome.Fitness.Fitness,
+                          chromosome.Strategy)
+    restored.Age = chromosome.Age
+    return restored
+
+
+def _get_best_batch(fitness, targetLen, optimalFitness, geneSet, display,
+                    custom_mutate, custom_create, maxAge, poolSize, crossover,
+                    deadline, settings, batchSize):
+    import numpy
+    get_fitness_batch = fitness.get_fitness_batch
+
+    def fnScoreChildren(children):
+        _score_batch(children, get_fitness_batch)
+
+    fnNewChildren = None
+    fnMutateRows = None
+    if custom_mutate is None and crossover is None and \
+            fitness.get_fitness_delta is None:
+        generator = numpy.random.default_rng(settings.Rng.getrandbits(64))
+        # a string gene set must become an array of its characters
+        geneArray = numpy.array(list(geneSet))
+        if settings.Generational is not None or \
+                settings.RejectDuplicates or \
+                settings.GeneTypeCode is not None:
+            # build the mutants of the whole batch as rows of one array
+            def fnNewChildren(parents):
+                return _mutate_batch(parents, geneArray, get_fitness_batch,
+                                     generator)
+        else:
+            # the pool itself is kept as rows of one array
+            def fnMutateRows(genes):
+                _mutate_rows(genes, geneArray, generator)
+
+    return _get_best(fitness, targetLen, optimalFitness, geneSet, display,
+                     custom_mutate, custom_create, maxAge, poolSize,
+                     crossover, deadline, settings, fnScoreChildren,
+                     batchSize, new_children=fnNewChildren,
+                     mutate_rows=fnMutateRows)
+
+
+def _get_best(fitness, targetLen, optimalFitness, geneSet, display,
+              custom_mutate, custom_create, maxAge, poolSize, crossover,
+              deadline, settings, score_children=None, batchSize=1,
+              migrate=None, migrationInterval=None, new_children=None,
+              mutate_rows=None):
+    get_fitness = fitness.get_fitness
+    get_fitness_delta = fitness.get_fitness_delta
+    get_bounded_fitness = fitness.get_bounded_fitness
+    generational = settings.Generational
+    rng = settings.Rng
+    stats = settings.Stats
+    searchBudget = settings.SearchBudget
+    # children only need to be scored well enough to compare with the parent
+    bounded = get_bounded_fitness is not None and score_children is None \
+        and not generational
+    bound = None
+    if bounded:
+        def get_child_fitness(genes):
+            return get_bounded_fitness(genes, bound=bound)
+    elif score_children is None:
+        get_child_fitness = get_fitness
+    else:
+        # children are scored as a batch by score_children
+        def get_child_fitness(genes):
+            return None
+
+    if get_fitness_delta is not None:
+        get_mutant_fitness = get_fitness_delta
+    else:
+        def get_mutant_fitness(parent, genes, changes):
+            return get_child_fitness(genes)
+
+    genomeIndex = None
+    if settings.RejectDuplicates:
+        genomeIndex = _GenomeIndex(stats)
+        # duplicates of a pool member are caught before they are scored
+        fnGetChildFitness = get_child_fitness
+        fnGetMutantFitness = get_mutant_fitness
+
+        def get_child_fitness(genes):
+            if genes in genomeIndex:
+                return _Duplicate
+            return fnGetChildFitness(genes)
+
+        def get_mutant_fitness(parent, genes, changes):
+            if genes in genomeIndex:
+                return _Duplicate
+            return fnGetMutantFitness(parent, genes, changes)
+
+    # batched children are alive together so they need their own genes
+    inPlace = settings.MutateInPlace and score_children is None and \
+        not generational
+    tracked = settings.MutateInPlace or get_fitness_delta is not None
+
+    def create_mutate(custom):
+        if custom is None and tracked:
+            return lambda parent: _mutate_tracked(parent, geneSet,
+                                                  get_mutant_fitness, inPlace,
+                                                  rng)
+        if tracked:
+            return lambda parent: _mutate_custom_tracked(
+                parent, custom, get_mutant_fitness, inPlace)
+        if custom is None:
+            return lambda parent: _mutate(parent, geneSet, get_child_fitness,
+                                          rng)
+        return lambda parent: _mutate_custom(parent, custom,
+                                             get_child_fitness)
+
+    if isinstance(custom_mutate, (list, tuple)):
+        mutators = [create_mutate(m) for m in custom_mutate]
+
         def fnMutate(parent):
-            return _mutate_custom(parent, custom_mutate, get_fitness)
+            return rng.choice(mutators)(parent)
+    else:
+        mutators = [create_mutate(custom_mutate)]
+        fnMutate = mutators[0]
 
     if custom_create is None:
         def fnGenerateParent():
-            return _generate_parent(targetLen, geneSet, get_fitness)
+            return _generate_parent(targetLen, geneSet, get_fitness, rng)
     else:
         def fnGenerateParent():
             genes = custom_create()
             return Chromosome(genes, get_fitness(genes), Strategies.Create)
 
-    strategyLookup = {
-        Strategies.Create: lambda p, i, o: fnGenerateParent(),
-        Strategies.Mutate: lambda p, i, o: fnMutate(p),
-        Strategies.Crossover: lambda p, i, o:
-        _crossover(p.Genes, i, o, get_fitness, crossover, fnMutate,
-                   fnGenerateParent)
-    }
+    geneTypeCode = settings.GeneTypeCode
+    if geneTypeCode is not None:
+        # children copy the parent's genes so they stay typed too
+        fnCreateParent = fnGenerateParent
+
+        def fnGenerateParent():
+            parent = fnCreateParent()
+            parent.Genes = array(geneTypeCode, parent.Genes)
+            return parent
+
+        if new_children is not None:
+            fnNewChildren = new_children
+
+            def new_children(parents):
+                children = fnNewChildren(parents)
+                for child in children:
+                    child.Genes = array(geneTypeCode, child.Genes)
+                return children
 
-    usedStrategies = [strategyLookup[Strategies.Mutate]]
+    operators = [lambda p, i, o, m=m: m(p) for m in mutators]
     if crossover is not None:
-        usedStrategies.append(strategyLookup[Strategies.Crossover])
+        operators.append(lambda p, i, o: fnGenerateParent())
+        operators.append(lambda p, i, o:
+                         _crossover(p.Genes, i, o, get_child_fitness,
+                                    crossover, fnMutate, fnGenerateParent,
+                                    rng, genomeIndex))
+    if settings.RejectDuplicates:
+        operators = [partial(_new_unique_child, o, settings.DuplicateRetries,
+                             get_fitness if generational else None, stats)
+                     for o in operators]
+    if stats is not None:
+        operators = [stats.wrap_new_child(o) for o in operators]
+        if new_children is not None:
+            new_children = stats.wrap_new_children(new_children)
 
+    fnReportChild = None
+    scheduler = None
+    if len(operators) == 1:
         def fnNewChild(parent, index, parents):
-            return random.choice(usedStrategies)(parent, index, parents)
+            return operators[0](parent, index, parents)
     else:
+        scheduler = _OperatorScheduler(len(operators),
+                                       settings.Scheduling.Window,
+                                       settings.Scheduling.Selection, rng)
+        pending = deque()
+        # timings differ between runs, seeded runs that must repeat exactly
+        # count uses instead
+        timed = settings.Scheduling.Cost != StrategyCost.Uses
+
         def fnNewChild(parent, index, parents):
-            return fnMutate(parent)
+            operator = scheduler.select()
+            startTime = time.perf_counter()
+            child = operators[operator](parent, index, parents)
+            pending.append((operator, time.perf_counter() - startTime
+                            if timed else 1))
+            return child
 
-    for timedOut, improvement in _get_improvement(fnNewChild,
-                                                  fnGenerateParent, maxAge,
-                                                  poolSize, maxSeconds):
-        if timedOut:
-            return improvement
-        display(improvement)
-        f = strategyLookup[improvement.Strategy]
-        usedStrategies.append(f)
-        if not optimalFitness > improvement.Fitness:
-            return improvement
+        def fnReportChild(child, parent):
+            if len(pending) > 0:
+                operator, seconds = pending.popleft()
+                scheduler.record(operator,
+                                 child.Fitness is not Rejected and
+                                 child.Fitness > parent.Fitness, seconds)
+
+    if bounded:
+        fnCreateChild = fnNewChild
+
+        def fnNewChild(parent, index, parents):
+            nonlocal bound
+            bound = parent.Fitness
+            return fnCreateChild(parent, index, parents)
+
+    restartElites = 0
+    if settings.Restarts is None:
+        budgets = [None]
+    else:
+        restartElites = settings.Restarts.Elites
+        budgets = _get_restart_budgets(settings.Restarts.Policy,
+                                       settings.Restarts.Budget,
+                                       settings.Restarts.Factor)
+    best = None
+    elites = []
+    history = []
+    restarts = 0
+    resumeState = None
+    checkpoints = settings.Checkpoints or Checkpoints()
+    # a missing file means the run has not written its first checkpoint
+    if checkpoints.ResumeFrom is not None and \
+            os.path.exists(checkpoints.ResumeFrom):
+        state = _read_checkpoint(checkpoints.ResumeFrom)
+        rng.setstate(state["rng"])
+        random.setstate(state["random"])
+        if scheduler is not None:
+            scheduler.set_state(state["scheduler"])
+        best = state["best"]
+        elites = state["elites"]
+        history = state["history"]
+        restarts = state["restarts"]
+        budgets = islice(budgets, restarts, None)
+        if searchBudget is not None:
+            searchBudget.set_state(state["searchBudget"])
+        resumeState = state["loop"]
+    checkpoint = None
+    if checkpoints.FileName is not None:
+        def fnGetState():
+            return dict(rng=rng.getstate(), random=random.getstate(),
+                        scheduler=scheduler.get_state()
+                        if scheduler is not None else None,
+                        best=best, elites=elites, history=history,
+                        restarts=restarts,
+                        searchBudget=searchBudget.get_state()
+                        if searchBudget is not None else None)
+
+        checkpoint = _Checkpoint(checkpoints.FileName,
+                                 checkpoints.Interval, fnGetState)
+    for budget in budgets:
+        if generational:
+            improvements = _get_generations(
+                fnNewChild, fnGenerateParent, poolSize, deadline,
+                score_children=score_children,
+                offspringCount=max(batchSize, 2 * poolSize),
+                migrate=migrate, migrationInterval=migrationInterval,
+                new_children=new_children, report_child=fnReportChild,
+                maxStagnation=budget, initialParents=elites,
+                generational=generational, rng=rng, genomeIndex=genomeIndex,
+                stats=stats, checkpoint=checkpoint, resumeState=resumeState,
+                searchBudget=searchBudget)
+        elif mutate_rows is not None:
+            improvements = _get_array_improvement(
+                mutate_rows, fitness.get_fitness_batch, fnGenerateParent,
+                maxAge,
+                poolSize, deadline, batchSize, maxStagnation=budget,
+                initialParents=elites,
+                initialHistory=history if len(elites) > 0 else None,
+                rng=rng, stats=stats, checkpoint=checkpoint,
+                resumeState=resumeState, searchBudget=searchBudget)
+        else:
+            improvements = _get_improvement(
+                fnNewChild, fnGenerateParent, maxAge, poolSize, deadline,
+                score_children=score_children, batchSize=batchSize,
+                migrate=migrate, migrationInterval=migrationInterval,
+                new_children=new_children, report_child=fnReportChild,
+                maxStagnation=budget, initialParents=elites,
+                initialHistory=history if len(elites) > 0 else None,
+                rescore=get_fitness, rng=rng, genomeIndex=genomeIndex,
+                stats=stats, checkpoint=checkpoint, resumeState=resumeState,
+                searchBudget=searchBudget)
+        resumeState = None
+        try:
+            for timedOut, improvement in improvements:
+                if best is not None and \
+                        not improvement.Fitness > best.Fitness:
+                    if timedOut:
+                        return best
+                    continue
+                best = improvement
+                if timedOut:
+                    return best
+                history.append(best.Fitness)
+                if stats is not None:
+                    stats.improvement_found(best)
+                display(best)
+                if not optimalFitness > best.Fitness:
+                    return best
+        except _BudgetExhausted:
+            return best
+        if restartElites > 0 and improvement not in elites:
+            elites.append(improvement)
+            elites.sort(key=lambda c: c.Fitness, reverse=True)
+            del elites[restartElites:]
+        restarts += 1
+    return best
+
+
+def _get_restart_budgets(restartPolicy, restartBudget, restartFactor):
+    i = 1
+    while True:
+        if restartPolicy == RestartPolicy.Luby:
+            yield restartBudget * _luby(i)
+        else:
+            yield int(restartBudget * restartFactor ** (i - 1))
+        i += 1
+
+
+def _luby(i):
+    k = 1
+    while (1 << k) - 1 < i:
+        k += 1
+    if i == (1 << k) - 1:
+        return 1 << (k - 1)
+    return _luby(i - (1 << (k - 1)) + 1)
+
+
+def _new_unique_child(new_child, retries, rescore, stats, parent, index,
+                      parents):
+    child = new_child(parent, index, parents)
+    for _ in range(retries):
+        if child.Fitness is not _Duplicate:
+            return child
+        if stats is not None:
+            stats.duplicate_rejected(child)
+        _undo(parent, child)
+        child = new_child(parent, index, parents)
+    if child.Fitness is _Duplicate:
+        if stats is not None:
+            stats.duplicate_rejected(child)
+        # generations sort their candidates so they need a real fitness
+        child.Fitness = Rejected if rescore is None else rescore(child.Genes)
+    return child
 
 
 def _get_improvement(new_child, generate_parent, maxAge, poolSize,
-                     maxSeconds):
-    startTime = time.time()
-    bestParent = generate_parent()
-    yield maxSeconds is not None and time.time() - \
-          startTime > maxSeconds, bestParent
-    parents = [bestParent]
-    historicalFitnesses = [bestParent.Fitness]
-    for _ in range(poolSize - 1):
-        parent = generate_parent()
-        if maxSeconds is not None and time.time() - startTime > maxSeconds:
-            yield True, parent
-        if parent.Fitness > bestParent.Fitness:
-            yield False, parent
-            bestParent = parent
-            historicalFitnesses.append(parent.Fitness)
-        parents.append(parent)
+                     deadline, score_children=None, batchSize=1,
+                     migrate=None, migrationInterval=None,
+                     new_children=None, report_child=None,
+                     maxStagnation=None, initialParents=None,
+                     initialHistory=None, rescore=None, rng=random,
+                     genomeIndex=None, stats=None, checkpoint=None,
+                     resumeState=None, searchBudget=None):
+    seeds = list(initialParents or [])
+
+    def fnGenerateParent():
+        if len(seeds) == 0:
+            return generate_parent()
+        parent = seeds.pop(0)
+        parent.Age = 0
+        return parent
+
+    if resumeState is not None:
+        parents = resumeState["parents"]
+        bestParent = resumeState["bestParent"]
+        historicalFitnesses = resumeState["historicalFitnesses"]
+        pindex, childCount, stagnantCount = resumeState["counters"]
+        yield deadline.is_expired(), bestParent
+    else:
+        bestParent = fnGenerateParent()
+        yield deadline.is_expired(), bestParent
+        parents = [bestParent]
+        # seeded pools keep annealing against the earlier runs' improvements
+        historicalFitnesses = list(initialHistory or [])
+        if len(historicalFitnesses) == 0 or \
+                bestParent.Fitness > historicalFitnesses[-1]:
+            historicalFitnesses.append(bestParent.Fitness)
+        for _ in range(poolSize - 1):
+            parent = fnGenerateParent()
+            if deadline.is_expired():
+                yield True, parent
+            if parent.Fitness > bestParent.Fitness:
+                yield False, parent
+                bestParent = parent
+                historicalFitnesses.append(parent.Fitness)
+            parents.append(parent)
+        pindex = 1
+        childCount = 0
+        stagnantCount = 0
+    if genomeIndex is not None:
+        genomeIndex.reset(parents)
+
+    def fnReplace(index, chromosome):
+        parents[index] = chromosome
+        if genomeIndex is not None:
+            genomeIndex.replace(index, chromosome)
+
     lastParentIndex = poolSize - 1
-    pindex = 1
+    untilSampled = 0
     while True:
-        if maxSeconds is not None and time.time() - startTime > maxSeconds:
+        if deadline.is_expired():
             yield True, bestParent
-        pindex = pindex - 1 if pindex > 0 else lastParentIndex
-        parent = parents[pindex]
-        child = new_child(parent, pindex, parents)
-        if parent.Fitness > child.Fitness:
-            if maxAge is None:
-                continue
-            parent.Age += 1
-            if maxAge > parent.Age:
+        if checkpoint is not None and checkpoint.is_due():
+            checkpoint.save(dict(parents=parents, bestParent=bestParent,
+                                 historicalFitnesses=historicalFitnesses,
+                                 counters=(pindex, childCount,
+                                           stagnantCount)))
+        if searchBudget is not None:
+            searchBudget.create_children(batchSize)
+        if stats is not None and genomeIndex is None:
+            # without an index the pool's diversity is sampled once every
+            # 100 generations
+            untilSampled -= batchSize
+            if untilSampled < 0:
+                untilSampled = 100 * poolSize
+                stats.pool_sampled(parents)
+        if maxStagnation is not None and stagnantCount >= maxStagnation:
+            return
+        if migrate is not None and \
+                childCount >= migrationInterval * poolSize:
+            childCount = 0
+            for immigrant in migrate(bestParent):
+                immigrant.Age = 0
+                fnReplace(rng.randrange(0, poolSize), immigrant)
+                if immigrant.Fitness > bestParent.Fitness:
+                    bestParent = immigrant
+                    stagnantCount = 0
+                    yield False, bestParent
+                    historicalFitnesses.append(bestParent.Fitness)
+        childCount += batchSize
+        stagnantCount += batchSize
+        pindexes = []
+        for _ in range(batchSize):
+            pindex = pindex - 1 if pindex > 0 else lastParentIndex
+            pindexes.append(pindex)
+        if new_children is not None:
+            children = new_children([parents[i] for i in pindexes])
+        else:
+            children = [new_child(parents[i], i, parents) for i in pindexes]
+        if score_children is not None:
+            score_children(children)
+        for pindex, child in zip(pindexes, children):
+            parent = parents[pindex]
+            if report_child is not None:
+                report_child(child, parent)
+            try:
+                if child.Fitness is Rejected:
+                    # the child is worse than its parent
+                    if maxAge is None:
+                        continue
+                    if maxAge > parent.Age + 1:
+                        parent.Age += 1
+                        continue
+                    if genomeIndex is not None and child.Genes in genomeIndex:
+                        # a duplicate that outlasted its retries stays out
+                        parent.Age += 1
+                        continue
+                    # annealing needs the child's actual fitness
+                    child.Fitness = rescore(child.Genes)
+                if parent.Fitness > child.Fitness:
+                    if maxAge is None:
+                        continue
+                    parent.Age += 1
+                    if maxAge > parent.Age:
+                        continue
+                    index = bisect_left(historicalFitnesses, child.Fitness, 0,
+                                        len(historicalFitnesses))
+                    proportionSimilar = index / len(historicalFitnesses)
+                    if rng.random() < exp(-proportionSimilar):
+                        fnReplace(pindex, _keep(child))
+                        if stats is not None:
+                            stats.annealing_accepted(child)
+                        continue
+                    bestParent.Age = 0
+                    # the best parent's genes are still mutated in place
+                    # when it is the parent, and it already holds the slot
+                    if bestParent is not parent:
+                        fnReplace(pindex, bestParent)
+                    if stats is not None:
+                        stats.parent_replaced(parent)
+                    continue
+                if not child.Fitness > parent.Fitness:
+                    # same fitness
+                    child.Age = parent.Age + 1
+                    fnReplace(pindex, _keep(child))
+                    if stats is not None:
+                        stats.child_accepted(child)
+                    continue
+                child.Age = 0
+                fnReplace(pindex, _keep(child))
+                if stats is not None:
+                    stats.child_accepted(child)
+                if child.Fitness > bestParent.Fitness:
+                    bestParent = child
+                    stagnantCount = 0
+                    yield False, bestParent
+                    historicalFitnesses.append(bestParent.Fitness)
+            finally:
+                # children mutated in place share the parent's genes
+                _undo(parent, child)
+
+
+def _get_array_improvement(mutate_rows, get_fitness_batch, generate_parent,
+                           maxAge, poolSize, deadline, batchSize,
+                           maxStagnation=None, initialParents=None,
+                           initialHistory=None, rng=random, stats=None,
+                           checkpoint=None, resumeState=None,
+                           searchBudget=None):
+    # _get_improvement with the pool's genes as rows of one array, children
+    # are copied rows mutated in place and only a new best parent becomes a
+    # Chromosome
+    import numpy
+    seeds = list(initialParents or [])
+    if resumeState is not None:
+        genes = resumeState["genes"]
+        fitnesses = resumeState["fitnesses"]
+        ages = resumeState["ages"]
+        bestParent = resumeState["bestParent"]
+        historicalFitnesses = resumeState["historicalFitnesses"]
+        pindex, stagnantCount = resumeState["counters"]
+        yield deadline.is_expired(), bestParent
+    else:
+        bestParent = seeds.pop(0) if len(seeds) > 0 else generate_parent()
+        yield deadline.is_expired(), bestParent
+        parents = [bestParent]
+        historicalFitnesses = list(initialHistory or [])
+        if len(historicalFitnesses) == 0 or \
+                bestParent.Fitness > historicalFitnesses[-1]:
+            historicalFitnesses.append(bestParent.Fitness)
+        for _ in range(poolSize - 1):
+            parent = seeds.pop(0) if len(seeds) > 0 else generate_parent()
+            if deadline.is_expired():
+                yield True, parent
+            if parent.Fitness > bestParent.Fitness:
+                yield False, parent
+                bestParent = parent
+                historicalFitnesses.append(parent.Fitness)
+            parents.append(parent)
+        genes = numpy.array([p.Genes for p in parents])
+        fitnesses = [p.Fitness for p in parents]
+        ages = [0] * poolSize
+        pindex = 1
+        stagnantCount = 0
+    bestGenes = numpy.array(bestParent.Genes, dtype=genes.dtype)
+
+    lastParentIndex = poolSize - 1
+    untilSampled = 0
+    while True:
+        if deadline.is_expired():
+            yield True, bestParent
+        if checkpoint is not None and checkpoint.is_due():
+            checkpoint.save(dict(genes=genes, fitnesses=fitnesses, ages=ages,
+                                 bestParent=bestParent,
+                                 historicalFitnesses=historicalFitnesses,
+                                 counters=(pindex, stagnantCount)))
+        if searchBudget is not None:
+            searchBudget.create_children(batchSize)
+        if stats is not None:
+            untilSampled -= batchSize
+            if untilSampled < 0:
+                untilSampled = 100 * poolSize
+                stats.pool_sampled([Chromosome(row, fitness, None)
+                                    for row, fitness in zip(genes,
+                                                            fitnesses)])
+        if maxStagnation is not None and stagnantCount >= maxStagnation:
+            return
+        stagnantCount += batchSize
+        pindexes = []
+        for _ in range(batchSize):
+            pindex = pindex - 1 if pindex > 0 else lastParentIndex
+            pindexes.append(pindex)
+        startTime = time.perf_counter()
+        children = genes[pindexes]
+        mutate_rows(children)
+        if stats is not None:
+            seconds = (time.perf_counter() - startTime) / batchSize
+        childFitnesses = _to_list(get_fitness_batch(children))
+        for row, (pindex, fitness) in enumerate(zip(pindexes,
+                                                    childFitnesses)):
+            if stats is not None:
+                child = Chromosome(children[row], fitness, Strategies.Mutate)
+                stats.child_created(child, seconds)
+            if fitnesses[pindex] > fitness:
+                if maxAge is None:
+                    continue
+                ages[pindex] += 1
+                if maxAge > ages[pindex]:
+                    continue
+                index = bisect_left(historicalFitnesses, fitness, 0,
+                                    len(historicalFitnesses))
+                proportionSimilar = index / len(historicalFitnesses)
+                if rng.random() < exp(-proportionSimilar):
+                    genes[pindex] = children[row]
+                    fitnesses[pindex] = fitness
+                    ages[pindex] = 0
+                    if stats is not None:
+                        stats.annealing_accepted(child)
+                    continue
+                if stats is not None:
+                    stats.parent_replaced(Chromosome(genes[pindex],
+                                                     fitnesses[pindex],
+                                                     None))
+                genes[pindex] = bestGenes
+                fitnesses[pindex] = bestParent.Fitness
+                ages[pindex] = 0
                 continue
-            index = bisect_left(historicalFitnesses, child.Fitness, 0,
-                                len(historicalFitnesses))
-            proportionSimilar = index / len(historicalFitnesses)
-            if random.random() < exp(-proportionSimilar):
-                parents[pindex] = child
+            genes[pindex] = children[row]
+            if stats is not None:
+                stats.child_accepted(child)
+            if not fitness > fitnesses[pindex]:
+                # same fitness
+                ages[pindex] += 1
                 continue
-            bestParent.Age = 0
-            parents[pindex] = bestParent
-            continue
-        if not child.Fitness > parent.Fitness:
-            # same fitness
-            child.Age = parent.Age + 1
-            parents[pindex] = child
-            continue
-        child.Age = 0
-        parents[pindex] = child
-        if child.Fitness > bestParent.Fitness:
-            bestParent = child
+            fitnesses[pindex] = fitness
+            ages[pindex] = 0
+            if fitness > bestParent.Fitness:
+                bestGenes = children[row].copy()
+                bestParent = Chromosome(bestGenes.tolist(), fitness,
+                                        Strategies.Mutate)
+                stagnantCount = 0
+                yield False, bestParent
+                historicalFitnesses.append(fitness)
+
+
+def _get_generations(new_child, generate_parent, poolSize, deadline,
+                     score_children, offspringCount, migrate,
+                     migrationInterval, new_children, report_child,
+                     maxStagnation, initialParents, generational,
+                     rng=random, genomeIndex=None, stats=None, checkpoint=None,
+                     resumeState=None, searchBudget=None):
+    seeds = list(initialParents or [])
+    if resumeState is not None:
+        population = resumeState["population"]
+        bestParent = resumeState["bestParent"]
+        generation, stagnantCount = resumeState["counters"]
+        yield deadline.is_expired(), bestParent
+    else:
+        bestParent = None
+        population = []
+        for _ in range(poolSize):
+            parent = seeds.pop(0) if len(seeds) > 0 else generate_parent()
+            population.append(parent)
+            if bestParent is None or parent.Fitness > bestParent.Fitness:
+                bestParent = parent
+                yield deadline.is_expired(), bestParent
+            elif deadline.is_expired():
+                yield True, bestParent
+        generation = 0
+        stagnantCount = 0
+    if genomeIndex is not None:
+        genomeIndex.reset(population)
+    while True:
+        if deadline.is_expired():
+            yield True, bestParent
+        if checkpoint is not None and checkpoint.is_due():
+            checkpoint.save(dict(population=population,
+                                 bestParent=bestParent,
+                                 counters=(generation, stagnantCount)))
+        if searchBudget is not None:
+            searchBudget.start_generation()
+        if maxStagnation is not None and stagnantCount >= maxStagnation:
+            return
+        generation += 1
+        if migrate is not None and generation % migrationInterval == 0:
+            for immigrant in migrate(bestParent):
+                population[rng.randrange(0, poolSize)] = immigrant
+            if genomeIndex is not None:
+                genomeIndex.reset(population)
+        pindexes = [rng.randrange(0, poolSize)
+                    for _ in range(offspringCount)]
+        if new_children is not None:
+            children = new_children([population[i] for i in pindexes])
+        else:
+            children = [new_child(population[i], i, population)
+                        for i in pindexes]
+        if score_children is not None:
+            score_children(children)
+        if report_child is not None:
+            for pindex, child in zip(pindexes, children):
+                report_child(child, population[pindex])
+        stagnantCount += len(children)
+
+        population.sort(key=_get_fitness, reverse=True)
+        eliteCount = generational.EliteCount
+        survivors = population[:eliteCount]
+        # the rest of the old generation competes with the offspring
+        candidates = population[eliteCount:] + children
+        if generational.SurvivorSelection == SurvivorSelection.Truncation:
+            candidates.sort(key=_get_fitness, reverse=True)
+            survivors.extend(candidates[:poolSize - len(survivors)])
+        else:
+            size = min(generational.TournamentSize, len(candidates))
+            while len(survivors) < poolSize:
+                survivors.append(max(rng.sample(candidates, size),
+                                     key=_get_fitness))
+        population = survivors
+        if stats is not None:
+            survivorIds = set(map(id, population))
+            for child in children:
+                if id(child) in survivorIds:
+                    stats.child_accepted(child)
+        if genomeIndex is not None:
+            genomeIndex.reset(population)
+        elif stats is not None:
+            stats.pool_sampled(population)
+        generationBest = max(population, key=_get_fitness)
+        if generationBest.Fitness > bestParent.Fitness:
+            bestParent = generationBest
+            stagnantCount = 0
             yield False, bestParent
-            historicalFitnesses.append(bestParent.Fitness)
+
+
+def _get_fitness(chromosome):
+    return chromosome.Fitness
 
 
 def hill_climbing(optimizationFunction, is_improvement, is_optimal,
-                  get_next_feature_value, display, initialFeatureValue):
-    best = optimizationFunction(initialFeatureValue)
+                  get_next_feature_value, display, initialFeatureValue,
+                  maxSeconds=None, deadline=None, workers=None,
+                  featureStep=-1, seed=None):
+    rng = _get_random(seed)
+    deadline = Deadline(maxSeconds, deadline)
+    optimizationFunction = _pass_deadline(optimizationFunction, deadline)
+    randomState = _seed_random(rng)
     stdout = sys.stdout
-    sys.stdout = None
-    while not is_optimal(best):
-        featureValue = get_next_feature_value(best)
-        child = optimizationFunction(featureValue)
-        if is_improvement(best, child):
-            best = child
-            sys.stdout = stdout
-            display(best, featureValue)
-            sys.stdout = None
-    sys.stdout = stdout
+    try:
+        best = optimizationFunction(initialFeatureValue)
+        sys.stdout = None
+        while not is_optimal(best) and not deadline.is_expired():
+            featureValue = get_next_feature_value(best)
+            if workers is None:
+                child = optimizationFunction(featureValue)
+            else:
+                featureValue, child = _speculate(
+                    optimizationFunction, is_improvement, is_optimal, best,
+                    [featureValue + i * featureStep for i in range(workers)],
+                    deadline, rng)
+            if is_improvement(best, child):
+                best = child
+                sys.stdout = stdout
+                display(best, featureValue)
+                sys.stdout = None
+    finally:
+        sys.stdout = stdout
+        _restore_random(randomState)
     return best
 
 
+def _speculate(optimizationFunction, is_improvement, is_optimal, best,
+               featureValues, deadline, rng):
+    context = _get_process_context()
+    results = context.Queue()
+    processes = [context.Process(target=_run_racer,
+                                 args=(i, partial(optimizationFunction, value),
+                                       rng.getrandbits(64), results),
+                                 daemon=True)
+                 for i, value in enumerate(featureValues)]
+    for process in processes:
+        process.start()
+
+    children = [None] * len(processes)
+    pending = set(range(len(processes)))
+    try:
+        while pending and not deadline.is_expired():
+            dead = {i for i in pending if not processes[i].is_alive()}
+            try:
+                index, child, error = results.get(timeout=1)
+            except queue.Empty:
+                pending -= dead
+                continue
+            pending.discard(index)
+            if child is None:
+                raise RuntimeError(
+                    "feature value {} failed\n{}".format(
+                        featureValues[index], error))
+            children[index] = child
+            if is_improvement(best, child):
+                if is_optimal(child):
+                    break
+                # only the more aggressive feature values can still do better
+                pending = {i for i in pending if i > index}
+    finally:
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+            process.join()
+
+    chosen = None
+    for i, child in enumerate(children):
+        if child is None or not is_improvement(best, child):
+            continue
+        if chosen is None or is_improvement(children[chosen], child):
+            chosen = i
+    if chosen is None:
+        return featureValues[0], best
+    return featureValues[chosen], children[chosen]
+
+
 def tournament(generate_parent, crossover, compete, display, sort_key,
-               numParents=10, max_generations=100):
+               numParents=10, max_generations=100, workers=None,
+               schedule=None, rounds=None, resultCache=None, seed=None):
+    rng = _get_random(seed)
+    randomState = _seed_random(rng)
+    try:
+        return _play_tournament(generate_parent, crossover, compete,
+                                display, sort_key, numParents,
+                                max_generations, workers, schedule, rounds,
+                                resultCache, rng)
+    finally:
+        _restore_random(randomState)
+
+
+def _play_tournament(generate_parent, crossover, compete, display, sort_key,
+                     numParents, max_generations, workers, schedule, rounds,
+                     resultCache, rng):
     pool = [[generate_parent(), [0, 0, 0]] for _ in
             range(1 + numParents * numParents)]
     best, bestScore = pool[0]
+    if resultCache is None:
+        # surviving parents and repeated children replay the same games
+        resultCache = FitnessCache(2 * len(pool) * len(pool),
+                                   lambda players: (tuple(players[0]),
+                                                    tuple(players[1])))
 
     def getSortKey(x):
         return sort_key(x[0], x[1][CompetitionResult.Win],
                         x[1][CompetitionResult.Tie],
                         x[1][CompetitionResult.Loss])
 
+    def play(pairs, fnCompete):
+        players = [(pool[i][0], pool[j][0]) for i, j in pairs]
+        results = [resultCache.get(p) for p in players]
+        missing = [n for n, result in enumerate(results) if result is None]
+        for n, result in zip(missing, fnCompete([pairs[n] for n in missing])):
+            results[n] = result
+            resultCache.add(players[n], result)
+        for (i, j), result in zip(pairs, results):
+            pool[i][1][result] += 1
+            pool[j][1][2 - result] += 1
+
+    def playRounds():
+        if workers is None:
+            for pairs in _get_rounds(pool, schedule, rounds, getSortKey,
+                                     rng):
+                play(pairs, lambda indexes: [compete(pool[i][0], pool[j][0])
+                                             for i, j in indexes])
+            return
+        # genes need not be picklable, workers fork with this generation's
+        # players and receive index pairs
+        players = [x[0] for x in pool]
+        with _create_executor(workers, lambda i, j: compete(players[i],
+                                                            players[j])) \
+                as executor:
+            def fnCompete(indexes):
+                chunkSize = max(1, len(indexes) // (4 * workers))
+                return executor.map(_compete_in_worker, indexes,
+                                    chunksize=chunkSize)
+
+            for pairs in _get_rounds(pool, schedule, rounds, getSortKey,
+                                     rng):
+                play(pairs, fnCompete)
+
     generation = 0
     while generation < max_generations:
         generation += 1
-        for i in range(0, len(pool)):
-            for j in range(0, len(pool)):
-                if i == j:
-                    continue
-                playera, scorea = pool[i]
-                playerb, scoreb = pool[j]
-                result = compete(playera, playerb)
-                scorea[result] += 1
-                scoreb[2 - result] += 1
+        playRounds()
 
         pool.sort(key=getSortKey, reverse=True)
         if getSortKey(pool[0]) > getSortKey([best, bestScore]):
@@ -223,40 +1400,1108 @@ def tournament(generate_parent, crossover, compete, display, sort_key,
     return best
 
 
+def _get_rounds(pool, schedule, rounds, get_sort_key, rng):
+    indexes = list(range(len(pool)))
+    if schedule is None or schedule == Schedule.RoundRobin:
+        yield [(i, j) for i in indexes for j in indexes if i != j]
+        return
+    if rounds is None:
+        rounds = max(1, int(log(len(pool), 2)))
+    played = set()
+    byes = set()
+    for _ in range(rounds):
+        if schedule == Schedule.Swiss:
+            # scores are updated between rounds because this is a generator
+            indexes.sort(key=lambda i: get_sort_key(pool[i]), reverse=True)
+        else:
+            rng.shuffle(indexes)
+        unpaired = list(indexes)
+        if len(unpaired) % 2 == 1:
+            bye = next((i for i in reversed(unpaired) if i not in byes),
+                       unpaired[-1])
+            byes.add(bye)
+            unpaired.remove(bye)
+        pairs = []
+        while unpaired:
+            i = unpaired.pop(0)
+            # the nearest opponent not already played, else the nearest
+            j = next((j for j in unpaired if (i, j) not in played),
+                     unpaired[0])
+            unpaired.remove(j)
+            played.add((i, j))
+            played.add((j, i))
+            pairs.append((i, j))
+            pairs.append((j, i))
+        yield pairs
+
+
+def _pass_fitness(fn, get_fitness):
+    if not _has_parameter(fn, 'get_fitness'):
+        return fn
+    return partial(fn, get_fitness=get_fitness)
+
+
+def _pass_deadline(fn, deadline):
+    # callbacks opt in by declaring a deadline parameter
+    if not _has_parameter(fn, 'deadline'):
+        return fn
+    return partial(fn, deadline=deadline)
+
+
+def _has_parameter(fn, name):
+    if fn is None:
+        return False
+    try:
+        return name in inspect.signature(fn).parameters
+    except (TypeError, ValueError):
+        return False
+
+
+def _get_random(seed):
+    if seed is None:
+        return random
+    return seed if isinstance(seed, random.Random) else random.Random(seed)
+
+
+def _seed_random(rng):
+    # callbacks draw from the random module so a seeded run seeds it from
+    # its own stream, the returned state is restored when the run ends
+    if rng is random:
+        return None
+    state = random.getstate()
+    random.seed(rng.getrandbits(64))
+    return state
+
+
+def _restore_random(state):
+    if state is not None:
+        random.setstate(state)
+
+
+def _get_best_islands(fitness, targetLen, optimalFitness, geneSet, display,
+                      custom_mutate, custom_create, maxAge, poolSize,
+                      crossover, deadline, settings, parallel):
+    islands = parallel.Islands
+    context = _get_process_context()
+    results = context.Queue()
+    inboxes = [context.Queue() for _ in range(islands)]
+    getBestArgs = (fitness, targetLen, optimalFitness, geneSet,
+                   custom_mutate, custom_create, maxAge, poolSize, crossover,
+                   deadline)
+    # each island gets an independent stream derived from the run's
+    seeds = [settings.Rng.getrandbits(64) for _ in range(islands)]
+    processes = []
+    for i in range(islands):
+        if parallel.Topology == Topology.Ring:
+            outboxes = [inboxes[(i + 1) % islands]]
+        else:
+            outboxes = [inboxes[j] for j in range(islands) if j != i]
+        processes.append(context.Process(
+            target=_run_island,
+            args=(inboxes[i], outboxes, results, getBestArgs,
+                  parallel.MigrationInterval, settings, seeds[i], i,
+                  islands),
+            daemon=True))
+    for process in processes:
+        process.start()
+
+    best = None
+    pending = set(range(islands))
+    try:
+        while pending:
+            # islands that had already exited before the wait sent nothing
+            dead = {i for i in pending if not processes[i].is_alive()}
+            try:
+                index, finished, improvement, error = results.get(timeout=1)
+            except queue.Empty:
+                if len(dead) > 0:
+                    raise RuntimeError("island {} exited without a result"
+                                       .format(min(dead)))
+                continue
+            if error is not None:
+                raise RuntimeError(
+                    "island {} failed\n{}".format(index, error))
+            if finished:
+                pending.discard(index)
+            # an island whose share of the evaluations is zero has no best
+            if improvement is None:
+                continue
+            if best is not None and not improvement.Fitness > best.Fitness:
+                continue
+            best = improvement
+            if not finished:
+                display(best)
+            if not optimalFitness > best.Fitness:
+                break
+    finally:
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+            process.join()
+    return best
+
+
+def _run_island(inbox, outboxes, results, getBestArgs, migrationInterval,
+                settings, seed, index, islands):
+    # forked islands start with the parent's random state, they would all
+    # write the same checkpoint file so islands are not checkpointed
+    settings = copy(settings)
+    settings.Rng = _get_random(seed)
+    settings.Checkpoints = None
+    _seed_random(settings.Rng)
+    if settings.SearchBudget is not None:
+        settings.SearchBudget.share(index, islands)
+    fitness, targetLen, optimalFitness, geneSet, custom_mutate, \
+        custom_create, maxAge, poolSize, crossover, deadline = getBestArgs
+
+    def fnDisplay(improvement):
+        results.put((index, False, improvement, None))
+
+    def fnMigrate(bestParent):
+        for outbox in outboxes:
+            outbox.put(bestParent)
+        immigrants = []
+        while True:
+            try:
+                immigrants.append(inbox.get_nowait())
+            except queue.Empty:
+                return immigrants
+
+    try:
+        best = _get_best(fitness, targetLen, optimalFitness, geneSet,
+                         fnDisplay, custom_mutate, custom_create, maxAge,
+                         poolSize, crossover, deadline, settings,
+                         migrate=fnMigrate,
+                         migrationInterval=migrationInterval)
+    except Exception:
+        # the parent is waiting for every island so failures are sent too
+        results.put((index, True, None, traceback.format_exc()))
+        return
+    results.put((index, True, best, None))
+
+
+def race(fn, k, optimalFitness=None, seed=None):
+    context = _get_process_context()
+    results = context.Queue()
+    seedGenerator = random.Random(seed) if seed is not None else random
+    seeds = [seedGenerator.getrandbits(64) for _ in range(k)]
+    processes = [context.Process(target=_run_racer,
+                                 args=(i, fn, seeds[i], results),
+                                 daemon=True)
+                 for i in range(k)]
+    startTime = time.perf_counter()
+    for process in processes:
+        process.start()
+
+    seconds = [None] * k
+    best = winner = None
+    pending = set(range(k))
+    try:
+        while pending:
+            # racers that had already exited before the wait sent nothing
+            dead = {i for i in pending if not processes[i].is_alive()}
+            try:
+                index, result, elapsed = results.get(timeout=1)
+            except queue.Empty:
+                pending -= dead
+                continue
+            pending.discard(index)
+            if result is None:
+                raise RuntimeError(
+                    "racer {} failed\n{}".format(index, elapsed))
+            seconds[index] = elapsed
+            if best is None or result.Fitness > best.Fitness:
+                best, winner = result, index
+            if optimalFitness is None or \
+                    not optimalFitness > result.Fitness:
+                break
+        if best is None:
+            raise RuntimeError("every racer exited without a result")
+    finally:
+        for i, process in enumerate(processes):
+            if process.is_alive():
+                process.terminate()
+            process.join()
+            if seconds[i] is None:
+                seconds[i] = time.perf_counter() - startTime
+    return RaceResult(best, winner, seeds, seconds)
+
+
+def _run_racer(index, fn, seed, results):
+    random.seed(seed)
+    sys.stdout = None
+    startTime = time.perf_counter()
+    try:
+        best = fn()
+    except Exception:
+        # the parent is waiting for every racer so failures are sent too
+        results.put((index, None, traceback.format_exc()))
+        return
+    results.put((index, best, time.perf_counter() - startTime))
+
+
+def _get_process_context():
+    # fork lets child processes inherit closures that cannot be pickled
+    if 'fork' in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('fork')
+    return multiprocessing.get_context()
+
+
+def _create_executor(workers, get_fitness):
+    return ProcessPoolExecutor(workers, _get_process_context(),
+                               _set_worker_fitness, (get_fitness,))
+
+
+_workerFitness = None
+
+
+def _set_worker_fitness(get_fitness):
+    global _workerFitness
+    _workerFitness = get_fitness
+
+
+def _evaluate_in_worker(genes):
+    return _workerFitness(genes)
+
+
+def _compete_in_worker(players):
+    return _workerFitness(*players)
+
+
+# returned by a bounded fitness function when the child cannot match the bound
+Rejected = object()
+
+
+class Deadline:
+    def __init__(self, seconds=None, parent=None):
+        self._expiresAt = None if seconds is None else time.time() + seconds
+        self._parent = parent
+        self._cancelled = False
+
+    def cancel(self):
+        self._cancelled = True
+
+    def is_expired(self):
+        if self._cancelled or self._expiresAt is not None and \
+                time.time() > self._expiresAt:
+            return True
+        return self._parent is not None and self._parent.is_expired()
+
+    def remaining(self):
+        remaining = None if self._expiresAt is None else \
+            max(0, self._expiresAt - time.time())
+        if self._parent is not None:
+            parentRemaining = self._parent.remaining()
+            if remaining is None or parentRemaining is not None and \
+                    parentRemaining < remaining:
+                remaining = parentRemaining
+        return 0 if self.is_expired() else remaining
+
+
+class RaceResult:
+    def __init__(self, best, winner, seeds, seconds):
+        self.Best = best
+        self.Winner = winner
+        self.Seeds = seeds
+        self.Seconds = seconds
+
+
 class CompetitionResult(IntEnum):
     Loss = 0,
     Tie = 1,
     Win = 2,
 
 
+class _OperatorScheduler:
+    def __init__(self, count, window, selection, rng=random):
+        self._selection = selection
+        self._rng = rng
+        self._results = [deque(maxlen=window) for _ in range(count)]
+        self._successes = [0] * count
+        self._seconds = [0.0] * count
+
+    def select(self):
+        for index, results in enumerate(self._results):
+            if len(results) == 0:
+                return index
+        # improvements per second of operator time
+        values = [self._successes[i] / max(self._seconds[i], 1e-9)
+                  for i in range(len(self._results))]
+        best = max(values)
+        if best > 0:
+            values = [v / best for v in values]
+        if self._selection == OperatorSelection.UCB:
+            total = sum(len(r) for r in self._results)
+            return max(range(len(values)),
+                       key=lambda i: values[i] + sqrt(
+                           2 * log(total) / len(self._results[i])))
+        minimum = 0.1 / len(values)
+        valueSum = sum(values) or 1
+        weights = [minimum + (1 - len(values) * minimum) * v / valueSum
+                   for v in values]
+        return self._rng.choices(range(len(values)), weights)[0]
+
+    def record(self, index, succeeded, seconds):
+        results = self._results[index]
+        if len(results) == results.maxlen:
+            oldSucceeded, oldSeconds = results[0]
+            self._successes[index] -= oldSucceeded
+            self._seconds[index] -= oldSeconds
+        results.append((succeeded, seconds))
+        self._successes[index] += succeeded
+        self._seconds[index] += seconds
+
+    def get_state(self):
+        return [list(r) for r in self._results], list(self._successes), \
+            list(self._seconds)
+
+    def set_state(self, state):
+        results, successes, seconds = state
+        for i, r in enumerate(results):
+            self._results[i].clear()
+            self._results[i].extend(r)
+        self._successes = list(successes)
+        self._seconds = list(seconds)
+
+
+class _Checkpoint:
+    def __init__(self, fileName, interval, get_state):
+        self._fileName = fileName
+        self._interval = interval
+        self._get_state = get_state
+        # the first save is immediate so unpicklable genes fail early
+        self._nextTime = time.time()
+
+    def is_due(self):
+        return time.time() >= self._nextTime
+
+    def save(self, loopState):
+        state = self._get_state()
+        state["loop"] = loopState
+        # readers only ever see the previous or the new checkpoint
+        tempFileName = self._fileName + ".tmp"
+        with open(tempFileName, "wb") as file:
+            pickle.dump(state, file, pickle.HIGHEST_PROTOCOL)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tempFileName, self._fileName)
+        self._nextTime = time.time() + self._interval
+
+
+def _read_checkpoint(fileName):
+    with open(fileName, "rb") as file:
+        return pickle.load(file)
+
+
+class _BackgroundDisplay:
+    def __init__(self, display, interval):
+        self._display = display
+        self._interval = interval
+        # holds only the latest improvement, older ones are dropped
+        self._queue = queue.Queue(maxsize=1)
+        self._closing = threading.Event()
+        self._error = None
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def show(self, candidate):
+        # genes mutated in place would change while the thread formats them
+        snapshot = Chromosome(candidate.Genes[:], candidate.Fitness,
+                              candidate.Strategy)
+        snapshot.Age = candidate.Age
+        try:
+            self._queue.put_nowait(snapshot)
+        except queue.Full:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                pass
+            self._queue.put_nowait(snapshot)
+
+    def close(self):
+        self._closing.set()
+        self._queue.put(None)
+        self._thread.join()
+
+    def raise_error(self):
+        if self._error is not None:
+            raise self._error
+
+    def _run(self):
+        while True:
+            candidate = self._queue.get()
+            if candidate is None:
+                return
+            if self._error is None:
+                try:
+                    self._display(candidate)
+                except Exception as e:
+                    self._error = e
+            self._closing.wait(self._interval)
+
+
+# returned by the duplicate check in place of a fitness
+_Duplicate = object()
+
+
+class _GenomeIndex:
+    def __init__(self, stats=None):
+        self._stats = stats
+        self._keys = []
+        self._counts = {}
+
+    def __contains__(self, genes):
+        return tuple(genes) in self._counts
+
+    def reset(self, chromosomes):
+        self._keys = [tuple(c.Genes) for c in chromosomes]
+        self._counts = {}
+        for key in self._keys:
+            self._counts[key] = self._counts.get(key, 0) + 1
+        self._update_stats()
+
+    def replace(self, index, chromosome):
+        key = self._keys[index]
+        if self._counts[key] == 1:
+            del self._counts[key]
+        else:
+            self._counts[key] -= 1
+        key = tuple(chromosome.Genes)
+        self._keys[index] = key
+        self._counts[key] = self._counts.get(key, 0) + 1
+        self._update_stats()
+
+    def _update_stats(self):
+        if self._stats is not None:
+            self._stats.DistinctGenomes = len(self._counts)
+            self._stats.PoolSize = len(self._keys)
+
+
+class _BudgetExhausted(Exception):
+    pass
+
+
+class _SearchBudget:
+    def __init__(self, budget, poolSize):
+        self.Evaluations = 0
+        self.Children = 0
+        self.Generations = 0
+        self._maxEvaluations = budget.MaxEvaluations
+        self._maxGenerations = budget.MaxGenerations
+        self._maxStagnantEvaluations = budget.MaxStagnantEvaluations
+        self._poolSize = poolSize
+        self._bestFitness = None
+        self._lastImprovement = 0
+        self._lock = threading.Lock()
+        # forked pool workers evaluate what their owner already spent
+        self._pid = os.getpid()
+
+    def share(self, index, count):
+        # islands split the evaluations, generations and stagnation are
+        # counted per island
+        self._pid = os.getpid()
+        if self._maxEvaluations is not None:
+            self._maxEvaluations = self._maxEvaluations // count + \
+                (index < self._maxEvaluations % count)
+
+    def spend(self, count):
+        # limits are checked before the genes are evaluated so they are
+        # never exceeded
+        with self._lock:
+            evaluations = self.Evaluations + count
+            if self._maxEvaluations is not None and \
+                    evaluations > self._maxEvaluations:
+                raise _BudgetExhausted()
+            if self._maxStagnantEvaluations is not None and \
+                    evaluations - self._lastImprovement > \
+                    self._maxStagnantEvaluations:
+                raise _BudgetExhausted()
+            first = self.Evaluations
+            self.Evaluations = evaluations
+            return first
+
+    def record(self, first, fitnesses):
+        with self._lock:
+            for i, fitness in enumerate(fitnesses, first + 1):
+                if fitness is Rejected:
+                    continue
+                if self._bestFitness is None or fitness > self._bestFitness:
+                    self._bestFitness = fitness
+                    self._lastImprovement = max(self._lastImprovement, i)
+
+    def create_children(self, count):
+        # a steady state generation is one child per pool member
+        if self._maxGenerations is not None and self.Children + count > \
+                self._maxGenerations * self._poolSize:
+            raise _BudgetExhausted()
+        self.Children += count
+        self.Generations = self.Children // self._poolSize
+
+    def start_generation(self):
+        if self._maxGenerations is not None and \
+                self.Generations >= self._maxGenerations:
+            raise _BudgetExhausted()
+        self.Generations += 1
+
+    def get_state(self):
+        return self.Evaluations, self.Children, self.Generations, \
+            self._bestFitness, self._lastImprovement
+
+    def set_state(self, state):
+        self.Evaluations, self.Children, self.Generations, \
+            self._bestFitness, self._lastImprovement = state
+
+    def wrap(self, get_fitness):
+        if get_fitness is None:
+            return None
+
+        def fnGetFitness(*args, **kwargs):
+            if os.getpid() != self._pid:
+                return get_fitness(*args, **kwargs)
+            first = self.spend(1)
+            fitness = get_fitness(*args, **kwargs)
+            self.record(first, (fitness,))
+            return fitness
+
+        return fnGetFitness
+
+    def wrap_batch(self, get_fitness_batch):
+        if get_fitness_batch is None:
+            return None
+
+        def fnGetFitnessBatch(genes):
+            first = self.spend(len(genes))
+            fitnesses = get_fitness_batch(genes)
+            self.record(first, _to_list(fitnesses))
+            return fitnesses
+
+        return fnGetFitnessBatch
+
+
+class Stats:
+    def __init__(self):
+        self.StartTime = time.perf_counter()
+        self.Created = {strategy: 0 for strategy in Strategies}
+        self.Accepted = {strategy: 0 for strategy in Strategies}
+        # time spent creating children, not counting their fitness
+        self.Seconds = {strategy: 0.0 for strategy in Strategies}
+        self.Evaluations = 0
+        self.FitnessSeconds = 0.0
+        self.Improvements = 0
+        self.AgeReplacements = 0
+        self.AnnealingAcceptances = 0
+        self.Duplicates = 0
+        self.DistinctGenomes = 0
+        self.PoolSize = 0
+        # two clock reads per call cost about as much as a cheap fitness
+        # function, so one child and one evaluation in SampleInterval are
+        # timed and the times scaled up
+        self.SampleInterval = 16
+
+    def start(self):
+        self.StartTime = time.perf_counter()
+
+    def evaluations_per_second(self):
+        seconds = time.perf_counter() - self.StartTime
+        return self.Evaluations / seconds if seconds > 0 else 0
+
+    # the engine reports through these methods, override them to observe
+    # the run and call the base method to keep the counters, seconds is
+    # None for children and evaluations that were not timed
+    def child_created(self, child, seconds):
+        self.Created[child.Strategy] += 1
+        if seconds is not None:
+            self.Seconds[child.Strategy] += seconds
+
+    def child_accepted(self, child):
+        self.Accepted[child.Strategy] += 1
+
+    def annealing_accepted(self, child):
+        self.AnnealingAcceptances += 1
+        self.Accepted[child.Strategy] += 1
+
+    def parent_replaced(self, parent):
+        self.AgeReplacements += 1
+
+    def duplicate_rejected(self, child):
+        self.Duplicates += 1
+
+    def improvement_found(self, best):
+        self.Improvements += 1
+
+    def pool_sampled(self, chromosomes):
+        self.DistinctGenomes = len(set(tuple(c.Genes) for c in chromosomes))
+        self.PoolSize = len(chromosomes)
+
+    def fitness_evaluated(self, count, seconds):
+        self.Evaluations += count
+        if seconds is not None:
+            self.FitnessSeconds += seconds
+
+    def _get_hook(self, name):
+        # the wrappers update the counters themselves unless a subclass
+        # observes the event, a method call costs as much as the counting
+        if getattr(type(self), name) is getattr(Stats, name):
+            return None
+        return getattr(self, name)
+
+    def wrap(self, get_fitness):
+        # for the usual (genes) signature, *args and **kwargs would cost
+        # more than the counting
+        if get_fitness is None:
+            return None
+        interval = self.SampleInterval
+        hook = self._get_hook('fitness_evaluated')
+
+        def fnGetFitness(genes):
+            if (self.Evaluations + 1) % interval:
+                fitness = get_fitness(genes)
+                if hook is None:
+                    self.Evaluations += 1
+                else:
+                    hook(1, None)
+                return fitness
+            return self._time_evaluation(get_fitness, genes)
+
+        return fnGetFitness
+
+    def wrap_call(self, fn):
+        if fn is None:
+            return None
+        interval = self.SampleInterval
+
+        def fnGetFitness(*args, **kwargs):
+            if (self.Evaluations + 1) % interval:
+                fitness = fn(*args, **kwargs)
+                self.fitness_evaluated(1, None)
+                return fitness
+            return self._time_evaluation(fn, *args, **kwargs)
+
+        return fnGetFitness
+
+    def _time_evaluation(self, fn, *args, **kwargs):
+        startTime = time.perf_counter()
+        fitness = fn(*args, **kwargs)
+        self.fitness_evaluated(1, (time.perf_counter() - startTime) *
+                               self.SampleInterval)
+        return fitness
+
+    def wrap_batch(self, get_fitness_batch):
+        if get_fitness_batch is None:
+            return None
+
+        def fnGetFitnessBatch(genes):
+            startTime = time.perf_counter()
+            fitnesses = get_fitness_batch(genes)
+            self.fitness_evaluated(len(genes),
+                                   time.perf_counter() - startTime)
+            return fitnesses
+
+        return fnGetFitnessBatch
+
+    def wrap_new_child(self, new_child):
+        interval = self.SampleInterval
+        created = self.Created
+        hook = self._get_hook('child_created')
+        untilTimed = interval
+
+        def fnNewChild(parent, index, parents):
+            nonlocal untilTimed
+            untilTimed -= 1
+            if untilTimed > 0:
+                child = new_child(parent, index, parents)
+                if hook is None:
+                    created[child.Strategy] += 1
+                else:
+                    hook(child, None)
+                return child
+            untilTimed = interval
+            evaluations = self.Evaluations
+            startTime = time.perf_counter()
+            child = new_child(parent, index, parents)
+            seconds = time.perf_counter() - startTime
+            # the child's fitness time is estimated from the timed
+            # evaluations and taken out
+            if self.Evaluations > 0:
+                seconds -= (self.Evaluations - evaluations) * \
+                    self.FitnessSeconds / self.Evaluations
+            self.child_created(child, max(0.0, seconds) * interval)
+            return child
+
+        return fnNewChild
+
+    def wrap_new_children(self, new_children):
+        def fnNewChildren(parents):
+            fitnessSeconds = self.FitnessSeconds
+            startTime = time.perf_counter()
+            children = new_children(parents)
+            seconds = time.perf_counter() - startTime - \
+                (self.FitnessSeconds - fitnessSeconds)
+            for child in children:
+                self.child_created(child, seconds / len(children))
+            return children
+
+        return fnNewChildren
+
+
+class FitnessCache:
+    def __init__(self, maxSize, gene_key=None):
+        self.MaxSize = maxSize
+        self.Hits = 0
+        self.Misses = 0
+        self._get_key = gene_key if gene_key is not None else tuple
+        self._fitnesses = OrderedDict()
+
+    def get(self, genes):
+        key = self._get_key(genes)
+        fitness = self._fitnesses.get(key)
+        if fitness is None:
+            self.Misses += 1
+            return None
+        self.Hits += 1
+        self._fitnesses.move_to_end(key)
+        return fitness
+
+    def add(self, genes, fitness):
+        self._fitnesses[self._get_key(genes)] = fitness
+        if len(self._fitnesses) > self.MaxSize:
+            self._fitnesses.popitem(last=False)
+
+    def wrap(self, get_fitness):
+        def fnGetFitness(genes):
+            fitness = self.get(genes)
+            if fitness is None:
+                fitness = get_fitness(genes)
+                self.add(genes, fitness)
+            return fitness
+
+        return fnGetFitness
+
+
+class OperatorSelection(Enum):
+    UCB = 0,
+    ProbabilityMatching = 1
+
+
+class StrategyCost(Enum):
+    Seconds = 0,
+    Uses = 1
+
+
+class RestartPolicy(Enum):
+    Luby = 0,
+    Geometric = 1
+
+
+class Schedule(Enum):
+    RoundRobin = 0,
+    Swiss = 1,
+    Sampled = 2
+
+
+class SurvivorSelection(Enum):
+    Tournament = 0,
+    Truncation = 1
+
+
+class Topology(Enum):
+    Ring = 0,
+    FullyConnected = 1
+
+
+class Budget:
+    def __init__(self, maxEvaluations=None, maxGenerations=None,
+                 maxStagnantEvaluations=None):
+        # the first parent must be scored so there is a best to return
+        for name, limit in (("maxEvaluations", maxEvaluations),
+                            ("maxGenerations", maxGenerations),
+                            ("maxStagnantEvaluations",
+                             maxStagnantEvaluations)):
+            if limit is not None and limit < 1:
+                raise ValueError("{} must be at least 1".format(name))
+        self.MaxEvaluations = maxEvaluations
+        self.MaxGenerations = maxGenerations
+        self.MaxStagnantEvaluations = maxStagnantEvaluations
+
+
+class Restarts:
+    def __init__(self, policy=RestartPolicy.Luby, budget=1000, factor=2,
+                 elites=0):
+        self.Policy = policy
+        self.Budget = budget
+        self.Factor = factor
+        self.Elites = elites
+
+
+class Parallel:
+    def __init__(self, workers=None, islands=None, migrationInterval=100,
+                 topology=Topology.Ring, batchSize=None):
+        self.Workers = workers
+        self.Islands = islands
+        self.MigrationInterval = migrationInterval
+        self.Topology = topology
+        self.BatchSize = batchSize
+
+
+class Generational:
+    def __init__(self, survivorSelection=SurvivorSelection.Tournament,
+                 tournamentSize=3, eliteCount=1):
+        self.SurvivorSelection = survivorSelection
+        self.TournamentSize = tournamentSize
+        self.EliteCount = eliteCount
+
+
+class Scheduling:
+    def __init__(self, window=100, selection=OperatorSelection.UCB,
+                 cost=None):
+        self.Window = window
+        self.Selection = selection
+        # None counts uses in seeded runs and seconds otherwise
+        self.Cost = cost
+
+
+class Checkpoints:
+    def __init__(self, fileName=None, interval=60, resumeFrom=None):
+        self.FileName = fileName
+        self.Interval = interval
+        self.ResumeFrom = resumeFrom
+
+
+class Instrumentation:
+    def __init__(self, stats=None, displayInterval=None):
+        self.Stats = stats
+        self.DisplayInterval = displayInterval
+
+
 class Chromosome:
+    __slots__ = ('Genes', 'Fitness', 'Strategy', 'Age', 'UndoLog')
+
     def __init__(self, genes, fitness, strategy):
         self.Genes = genes
         self.Fitness = fitness
         self.Strategy = strategy
         self.Age = 0
+        self.UndoLog = None
 
 
 class Strategies(Enum):
     Create = 0,
     Mutate = 1,
     Crossover = 2
+    # members are singletons, Enum's own hash is slow in per-child counters
+    __hash__ = object.__hash__
 
 
 class Benchmark:
     @staticmethod
-    def run(function):
-        timings = []
+    def run(function, iterations=100, warmup=0, precision=0.05,
+            maxIterations=1000, resultsFile=None, baselineFile=None,
+            tolerance=0.1, profile=None, profileFile=None, profileTop=20):
+        global _evaluationCounter, _profiler
         stdout = sys.stdout
-        for i in range(100):
+        for _ in range(warmup):
             sys.stdout = None
-            startTime = time.time()
             function()
-            seconds = time.time() - startTime
             sys.stdout = stdout
+
+        timings = []
+        evaluations = 0
+        profiler = _Profiler(profile) if profile is not None else None
+        i = 0
+        while True:
+            if iterations is not None and i == iterations:
+                break
+            if iterations is None and (i == maxIterations or
+                                       i >= 10 and i % 10 == 0 and
+                                       _is_precise(timings, precision)):
+                break
+            _evaluationCounter = _EvaluationCounter()
+            _profiler = profiler
+            sys.stdout = None
+            try:
+                if profiler is not None:
+                    profiler.start()
+                startTime = time.perf_counter()
+                function()
+                seconds = time.perf_counter() - startTime
+            finally:
+                if profiler is not None:
+                    profiler.stop()
+                sys.stdout = stdout
+                evaluations += _evaluationCounter.Count
+                _evaluationCounter = None
+                _profiler = None
             timings.append(seconds)
             mean = statistics.mean(timings)
             if i < 10 or i % 10 == 9:
                 print("{} {:3.2f} {:3.2f}".format(
                     1 + i, mean,
                     statistics.stdev(timings, mean) if i > 1 else 0))
+            i += 1
+
+        results = _summarize(timings, evaluations)
+        print("median {:3.2f} p95 {:3.2f} min {:3.2f} max {:3.2f} "
+              "95% CI {:3.2f}-{:3.2f} {:.0f} evaluations/s".format(
+                results["median"], results["p95"], results["min"],
+                results["max"], results["ciLow"], results["ciHigh"],
+                results["evaluationsPerSecond"]))
+        if profiler is not None:
+            # timings above include the profilers' own overhead
+            report = profiler.report(profileTop, results)
+            if profileFile is None:
+                print(report)
+            else:
+                with open(profileFile, "w") as file:
+                    file.write(report)
+        if baselineFile is not None:
+            with open(baselineFile) as file:
+                baseline = json.load(file)
+            results["baselineMedian"] = baseline["median"]
+            results["regressed"] = results["ciLow"] > \
+                baseline["median"] * (1 + tolerance)
+            if results["regressed"]:
+                print("REGRESSION: median {:3.2f} vs baseline {:3.2f}".format(
+                    results["median"], baseline["median"]))
+        if resultsFile is not None:
+            with open(resultsFile, "w") as file:
+                json.dump(results, file, indent=2)
+        return results
+
+
+class _EvaluationCounter:
+    def __init__(self):
+        self.Count = 0
+
+    def wrap(self, get_fitness):
+        if get_fitness is None:
+            return None
+
+        def fnGetFitness(genes, **kwargs):
+            self.Count += 1
+            return get_fitness(genes, **kwargs)
+
+        return fnGetFitness
+
+    def wrap_batch(self, get_fitness_batch):
+        if get_fitness_batch is None:
+            return None
+
+        def fnGetFitnessBatch(genes):
+            self.Count += len(genes)
+            return get_fitness_batch(genes)
+
+        return fnGetFitnessBatch
+
+
+_evaluationCounter = None
+
+
+class Profiling(Enum):
+    Time = 0,
+    Memory = 1,
+    All = 2
+
+
+class _Profiler:
+    def __init__(self, mode):
+        self._cpu = cProfile.Profile() if mode != Profiling.Memory else None
+        self._memory = mode != Profiling.Time
+        self.Peaks = {}
+        # [allocated at entry, highest peak seen before a nested reset]
+        self._frames = []
+
+    def start(self):
+        if self._memory:
+            tracemalloc.start()
+            self._frames = [[0, 0]]
+        if self._cpu is not None:
+            self._cpu.enable()
+
+    def stop(self):
+        if self._cpu is not None:
+            self._cpu.disable()
+        if self._memory:
+            self._record_peak('total', self._frames.pop())
+            tracemalloc.stop()
+
+    def wrap(self, name, fn):
+        if fn is None or not self._memory:
+            return fn
+
+        def fnProfiled(*args, **kwargs):
+            current, peak = tracemalloc.get_traced_memory()
+            # the outer callback's peak so far is lost by the reset
+            outer = self._frames[-1]
+            outer[1] = max(outer[1], peak)
+            tracemalloc.reset_peak()
+            self._frames.append([current, 0])
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self._record_peak(name, self._frames.pop())
+
+        return fnProfiled
+
+    def _record_peak(self, name, frame):
+        allocated, peak = frame
+        peak = max(peak, tracemalloc.get_traced_memory()[1]) - allocated
+        self.Peaks[name] = max(self.Peaks.get(name, 0), peak)
+
+    def report(self, top, results):
+        stream = io.StringIO()
+        if self._cpu is not None:
+            stats = pstats.Stats(self._cpu, stream=stream)
+            stats.sort_stats(pstats.SortKey.TIME).print_stats(top)
+            hot = sorted(stats.stats.items(), key=lambda x: x[1][2],
+                         reverse=True)[:top]
+            results["hotFunctions"] = [
+                {"function": pstats.func_std_string(function),
+                 "calls": calls, "seconds": seconds,
+                 "cumulativeSeconds": cumulativeSeconds}
+                for function, (_, calls, seconds, cumulativeSeconds, _)
+                in hot]
+        if self._memory:
+            results["peakMemory"] = dict(self.Peaks)
+            print("peak memory by callback", file=stream)
+            for name, peak in sorted(self.Peaks.items(), key=lambda x: x[1],
+                                     reverse=True):
+                print("{:>10} {:12,} bytes".format(name, peak), file=stream)
+        return stream.getvalue()
+
+
+_profiler = None
+
+
+def _is_precise(timings, precision):
+    low, high = _bootstrap_median_interval(timings)
+    return high - low <= 2 * precision * statistics.median(timings)
+
+
+def _bootstrap_median_interval(timings, resamples=1000):
+    # a private generator keeps the benchmarked runs' random state intact
+    generator = random.Random(len(timings))
+    medians = sorted(statistics.median(generator.choices(timings,
+                                                         k=len(timings)))
+                     for _ in range(resamples))
+    return medians[int(resamples * 0.025)], medians[int(resamples * 0.975)]
+
+
+def _summarize(timings, evaluations):
+    low, high = _bootstrap_median_interval(timings)
+    totalSeconds = sum(timings)
+    return {
+        "iterations": len(timings),
+        "mean": statistics.mean(timings),
+        "stdev": statistics.stdev(timings) if len(timings) > 1 else 0,
+        "median": statistics.median(timings),
+        "p95": statistics.quantiles(timings, n=20, method='inclusive')[18]
+        if len(timings) > 1 else timings[0],
+        "min": min(timings),
+        "max": max(timings),
+        "ciLow": low,
+        "ciHigh": high,
+        "evaluations": evaluations,
+        "evaluationsPerSecond": evaluations / totalSeconds
+        if totalSeconds > 0 else 0,
+        "timings": timings,
+    }
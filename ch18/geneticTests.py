@@ -0,0 +1,767 @@
+# File: geneticTests.py
+#    from chapter 18 of _Genetic Algorithms with Python_
+#
+# Author: Clinton Sheppard <fluentcoder@gmail.com>
+# Copyright (c) 2016 Clinton Sheppard
+#
+# Licensed under the Apache License, Version 2.0 (the "License").
+# You may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.  See the License for the specific language governing
+# permissions and limitations under the License.
+
+import asyncio
+import os
+import random
+import tempfile
+import time
+import unittest
+from itertools import groupby
+
+import genetic
+
+
+def get_fitness(genes, target):
+    return sum(1 for expected, actual in zip(target, genes)
+               if expected == actual)
+
+
+class Fitness:
+    def __init__(self, matches, length):
+        self.Matches = matches
+        self.Length = length
+
+    def __gt__(self, other):
+        return self.Matches > other.Matches
+
+    def __str__(self):
+        return "{}/{}".format(self.Matches, self.Length)
+
+
+class GeneticTests(unittest.TestCase):
+    geneset = " abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ!.,"
+
+    def setUp(self):
+        # long enough that no budget test reaches the optimal fitness
+        self.target = ''.join(random.Random(3).choice(self.geneset)
+                              for _ in range(100))
+        self.fitnesses = []
+
+    def fnGetFitness(self, genes):
+        fitness = get_fitness(genes, self.target)
+        self.fitnesses.append(fitness)
+        return fitness
+
+    def get_best(self, display=lambda candidate: None, **options):
+        return genetic.get_best(self.fnGetFitness, len(self.target),
+                                len(self.target), self.geneset, display,
+                                **options)
+
+    def guess(self, target, **options):
+        self.target = target
+        best = self.get_best(**options)
+        self.assertEqual(target, ''.join(best.Genes))
+        return best
+
+    def test_workers(self):
+        best = self.guess("Hello World!",
+                          parallel=genetic.Parallel(workers=2))
+        self.assertEqual(get_fitness(best.Genes, self.target), best.Fitness)
+
+    def test_islands(self):
+        for topology in genetic.Topology:
+            best = self.guess("Hello World!", parallel=genetic.Parallel(
+                islands=2, migrationInterval=20, topology=topology))
+            self.assertEqual(get_fitness(best.Genes, self.target),
+                             best.Fitness)
+
+    def test_islands_fitness_error(self):
+        def fnGetFitness(genes):
+            # each island counts its own evaluations
+            if len(self.fitnesses) == 50:
+                raise ValueError("fitness failed")
+            return self.fnGetFitness(genes)
+
+        with self.assertRaises(RuntimeError) as context:
+            genetic.get_best(fnGetFitness, len(self.target),
+                             len(self.target), self.geneset,
+                             lambda candidate: None,
+                             parallel=genetic.Parallel(islands=2))
+        self.assertIn("fitness failed", str(context.exception))
+
+    def test_fitness_cache(self):
+        cache = genetic.FitnessCache(1000)
+        best = self.guess("Hello World!", fitnessCache=cache, poolSize=3,
+                          maxAge=20, seed=1)
+        self.assertEqual(get_fitness(best.Genes, self.target), best.Fitness)
+        # only misses reach the fitness function
+        self.assertEqual(len(self.fitnesses), cache.Misses)
+        self.assertGreater(cache.Hits, 0)
+
+    def test_bounded_fitness(self):
+        calls = []
+
+        def fnGetFitness(genes, bound=None):
+            fitness = get_fitness(genes, self.target)
+            if bound is not None and bound > fitness:
+                fitness = genetic.Rejected
+            calls.append((bound, fitness))
+            return fitness
+
+        self.target = "Hello World!"
+        best = genetic.get_best(fnGetFitness, len(self.target),
+                                len(self.target), self.geneset,
+                                lambda candidate: None, seed=1)
+        self.assertEqual(self.target, ''.join(best.Genes))
+        # without maxAge a rejected child is never rescored
+        self.assertEqual([None], [bound for bound, _ in calls
+                                  if bound is None])
+
+        maxAge = 3
+        del calls[:]
+        best = genetic.get_best(fnGetFitness, len(self.target),
+                                len(self.target), self.geneset,
+                                lambda candidate: None, maxAge=maxAge,
+                                seed=1)
+        self.assertEqual(self.target, ''.join(best.Genes))
+        # replay the single parent's age from the calls
+        parentFitness = bestFitness = calls[0][1]
+        age = 0
+        rescored = 0
+        index = 1
+        while index < len(calls):
+            bound, fitness = calls[index]
+            index += 1
+            self.assertEqual(parentFitness, bound)
+            if fitness is genetic.Rejected:
+                if maxAge > age + 1:
+                    age += 1
+                    continue
+                # the parent reached maxAge so annealing needs the fitness
+                bound, fitness = calls[index]
+                index += 1
+                self.assertIsNone(bound)
+                self.assertGreater(parentFitness, fitness)
+                rescored += 1
+                # annealed in or replaced by the best parent
+                parentFitness = calls[index][0]
+                self.assertIn(parentFitness, (fitness, bestFitness))
+                age = 0
+                continue
+            age = age + 1 if fitness == parentFitness else 0
+            parentFitness = fitness
+            bestFitness = max(bestFitness, fitness)
+        self.assertGreater(rescored, 0)
+
+    def test_bounded_fitness_skips_cache(self):
+        calls = []
+
+        def fnGetFitness(genes, bound=None):
+            fitness = get_fitness(genes, self.target)
+            calls.append(bound)
+            if bound is not None and bound > fitness:
+                return genetic.Rejected
+            return fitness
+
+        cache = genetic.FitnessCache(1000)
+        self.target = "Hello World!"
+        genetic.get_best(fnGetFitness, len(self.target), len(self.target),
+                         self.geneset, lambda candidate: None, maxAge=3,
+                         fitnessCache=cache, seed=1)
+        # only the full evaluations go through the cache
+        self.assertEqual(calls.count(None), cache.Misses)
+        self.assertGreater(len(calls), cache.Hits + cache.Misses)
+
+    def test_fitness_delta(self):
+        deltas = []
+
+        def fnGetFitnessDelta(parent, genes, changes):
+            fitness = parent.Fitness
+            for index, oldGene in changes:
+                fitness -= oldGene == self.target[index]
+                fitness += genes[index] == self.target[index]
+            deltas.append((fitness, get_fitness(genes, self.target)))
+            return fitness
+
+        for mutateInPlace in [False, True]:
+            del deltas[:]
+            best = self.guess("Hello World!",
+                              get_fitness_delta=fnGetFitnessDelta,
+                              mutateInPlace=mutateInPlace)
+            self.assertGreater(len(deltas), 0)
+            for fitness, expected in deltas:
+                self.assertEqual(expected, fitness)
+            self.assertEqual(get_fitness(best.Genes, self.target),
+                             best.Fitness)
+
+    def test_fitness_batch(self):
+        import numpy
+        target = "Hello World!"
+        targetArray = numpy.array(list(target))
+
+        def fnGetFitnessBatch(genes):
+            return (genes == targetArray).sum(axis=1)
+
+        # the gene set is a string, rows hold its characters
+        for options in [dict(), dict(poolSize=5, maxAge=20),
+                        dict(generational=genetic.Generational(),
+                             poolSize=10)]:
+            best = genetic.get_best(None, len(target), len(target),
+                                    self.geneset, lambda candidate: None,
+                                    get_fitness_batch=fnGetFitnessBatch,
+                                    **options)
+            self.assertEqual(target, ''.join(best.Genes))
+            self.assertEqual(len(target), best.Fitness)
+
+    def test_generational(self):
+        for survivorSelection in genetic.SurvivorSelection:
+            best = self.guess("Hello World!", poolSize=10,
+                              generational=genetic.Generational(
+                                  survivorSelection, eliteCount=2))
+            self.assertEqual(get_fitness(best.Genes, self.target),
+                             best.Fitness)
+
+    def test_fitness_key(self):
+        target = "Hello World!"
+        displayed = []
+
+        def fnGetFitness(genes):
+            return Fitness(get_fitness(genes, target), len(target))
+
+        best = genetic.get_best(fnGetFitness, len(target),
+                                Fitness(len(target), len(target)),
+                                self.geneset, displayed.append,
+                                fitness_key=lambda fitness: fitness.Matches)
+        self.assertEqual(target, ''.join(best.Genes))
+        # display and the caller get the fitness objects back
+        self.assertIsInstance(best.Fitness, Fitness)
+        self.assertEqual(len(target), best.Fitness.Matches)
+        self.assertGreater(len(displayed), 0)
+        for candidate in displayed:
+            self.assertIsInstance(candidate.Fitness, Fitness)
+            self.assertEqual(get_fitness(candidate.Genes, target),
+                             candidate.Fitness.Matches)
+
+    def test_fitness_key_with_fitness_delta(self):
+        target = "Hello World!"
+
+        def fnGetFitness(genes):
+            return Fitness(get_fitness(genes, target), len(target))
+
+        def fnGetFitnessDelta(parent, genes, changes):
+            matches = parent.Fitness.Matches
+            for index, oldGene in changes:
+                matches -= oldGene == target[index]
+                matches += genes[index] == target[index]
+            return Fitness(matches, len(target))
+
+        def fnMutate(genes, changes):
+            index = random.randrange(len(genes))
+            changes.append((index, genes[index]))
+            genes[index] = random.choice(self.geneset)
+
+        best = genetic.get_best(fnGetFitness, len(target),
+                                Fitness(len(target), len(target)),
+                                self.geneset, lambda candidate: None,
+                                custom_mutate=fnMutate,
+                                get_fitness_delta=fnGetFitnessDelta,
+                                fitness_key=lambda fitness: fitness.Matches)
+        self.assertEqual(target, ''.join(best.Genes))
+        self.assertIsInstance(best.Fitness, Fitness)
+
+    def test_fitness_key_does_not_rescore(self):
+        displayed = []
+
+        def fnGetFitness(genes):
+            return Fitness(self.fnGetFitness(genes), len(self.target))
+
+        genetic.get_best(fnGetFitness, len(self.target),
+                         Fitness(len(self.target), len(self.target)),
+                         self.geneset, displayed.append,
+                         budget=genetic.Budget(maxEvaluations=500),
+                         fitness_key=lambda fitness: fitness.Matches)
+        # the displayed fitness objects are the ones the search computed
+        self.assertGreater(len(displayed), 1)
+        self.assertEqual(500, len(self.fitnesses))
+
+    def test_seed_repeats_trace_with_crossover(self):
+        def fnCrossover(parentGenes, donorGenes):
+            index = random.randrange(len(parentGenes))
+            return parentGenes[:index] + donorGenes[index:]
+
+        randomState = random.getstate()
+        traces = []
+        for _ in range(2):
+            trace = []
+            self.get_best(lambda candidate: trace.append(
+                (candidate.Fitness, candidate.Strategy,
+                 ''.join(candidate.Genes))),
+                poolSize=5, maxAge=30, crossover=fnCrossover,
+                budget=genetic.Budget(maxEvaluations=3000), seed=42)
+            traces.append(trace)
+        self.assertGreater(len(traces[0]), 1)
+        self.assertEqual(traces[0], traces[1])
+        # the random module is seeded only for the run
+        self.assertEqual(randomState, random.getstate())
+
+    def test_stats_created(self):
+        calls = {strategy: 0 for strategy in genetic.Strategies}
+
+        def fnCreate():
+            calls[genetic.Strategies.Create] += 1
+            return [random.choice(self.geneset) for _ in self.target]
+
+        def fnMutate(genes):
+            calls[genetic.Strategies.Mutate] += 1
+            index = random.randrange(len(genes))
+            genes[index] = random.choice(self.geneset)
+
+        def fnCrossover(parentGenes, donorGenes):
+            calls[genetic.Strategies.Crossover] += 1
+            index = random.randrange(len(parentGenes))
+            return parentGenes[:index] + donorGenes[index:]
+
+        stats = genetic.Stats()
+
+        def fnDisplay(candidate):
+            # counted as they happen, not in groups
+            self.assertEqual(len(self.fitnesses), stats.Evaluations)
+
+        self.target = "Hello World!"
+        self.get_best(fnDisplay, custom_create=fnCreate,
+                      custom_mutate=fnMutate, crossover=fnCrossover,
+                      poolSize=5, maxAge=10, seed=1,
+                      budget=genetic.Budget(maxGenerations=200),
+                      instrumentation=genetic.Instrumentation(stats))
+        # the initial pool is not created by an operator
+        calls[genetic.Strategies.Create] -= 5
+        self.assertGreater(min(calls.values()), 0)
+        self.assertEqual(calls, stats.Created)
+        self.assertEqual(len(self.fitnesses), stats.Evaluations)
+        for strategy in genetic.Strategies:
+            self.assertLessEqual(stats.Accepted[strategy],
+                                 stats.Created[strategy])
+
+    def test_stats_accepted(self):
+        stats = genetic.Stats()
+        self.get_best(budget=genetic.Budget(maxEvaluations=1000), seed=1,
+                      instrumentation=genetic.Instrumentation(stats))
+        # a single parent is replaced by every child at least as fit
+        accepted = 0
+        parentFitness = self.fitnesses[0]
+        for fitness in self.fitnesses[1:]:
+            if not parentFitness > fitness:
+                accepted += 1
+                parentFitness = fitness
+        self.assertEqual(1000, stats.Evaluations)
+        self.assertEqual(999, stats.Created[genetic.Strategies.Mutate])
+        self.assertEqual(accepted, stats.Accepted[genetic.Strategies.Mutate])
+        self.assertEqual(0, stats.AgeReplacements)
+        self.assertEqual(0, stats.AnnealingAcceptances)
+
+    def test_stats_age_replacements(self):
+        class RecordingStats(genetic.Stats):
+            def __init__(self):
+                super().__init__()
+                self.Events = {}
+
+            def record(self, name):
+                self.Events[name] = self.Events.get(name, 0) + 1
+
+            def child_created(self, child, seconds):
+                self.record("created")
+                super().child_created(child, seconds)
+
+            def fitness_evaluated(self, count, seconds):
+                self.record("evaluated")
+                super().fitness_evaluated(count, seconds)
+
+            def parent_replaced(self, parent):
+                self.record("replaced")
+                super().parent_replaced(parent)
+
+        stats = genetic.Stats()
+        self.target = "Hello World!"
+        self.get_best(maxAge=1, budget=genetic.Budget(maxEvaluations=2000),
+                      seed=1, instrumentation=genetic.Instrumentation(stats))
+        mutate = genetic.Strategies.Mutate
+        # with maxAge 1 every worse child is annealed in or the parent is
+        # replaced by the best
+        self.assertGreater(stats.AgeReplacements, 0)
+        self.assertGreater(stats.AnnealingAcceptances, 0)
+        self.assertEqual(stats.Created[mutate],
+                         stats.Accepted[mutate] + stats.AgeReplacements)
+
+        # overridden methods see the same counts
+        recordingStats = RecordingStats()
+        self.get_best(maxAge=1, budget=genetic.Budget(maxEvaluations=2000),
+                      seed=1, instrumentation=genetic.Instrumentation(
+                          recordingStats))
+        self.assertEqual(stats.Created, recordingStats.Created)
+        self.assertEqual(stats.Accepted, recordingStats.Accepted)
+        self.assertEqual(stats.AgeReplacements,
+                         recordingStats.AgeReplacements)
+        self.assertEqual(dict(created=stats.Created[mutate],
+                              evaluated=stats.Evaluations,
+                              replaced=stats.AgeReplacements),
+                         recordingStats.Events)
+
+    def test_reject_duplicates(self):
+        test = self
+        poolSize = 10
+
+        class PoolStats(genetic.Stats):
+            # mirrors the pool, steady state children replace the parents
+            # in a fixed order starting at slot 0
+            def __init__(self, pool):
+                super().__init__()
+                self.Pool = pool
+                self.Best = None
+                self.Slots = [0] + list(range(poolSize - 1, 0, -1))
+                self.Children = 0
+                self.Slot = None
+
+            def child_created(self, child, seconds):
+                super().child_created(child, seconds)
+                if self.Best is None:
+                    self.Best = max(self.Pool, key=lambda p: p[0])
+                self.Slot = self.Slots[self.Children % poolSize]
+                self.Children += 1
+
+            def accept(self, child):
+                genes = tuple(child.Genes)
+                test.assertNotIn(genes, [p[1] for p in self.Pool])
+                self.Pool[self.Slot] = (child.Fitness, genes)
+                if child.Fitness > self.Best[0]:
+                    self.Best = self.Pool[self.Slot]
+
+            def child_accepted(self, child):
+                super().child_accepted(child)
+                self.accept(child)
+
+            def annealing_accepted(self, child):
+                super().annealing_accepted(child)
+                self.accept(child)
+
+            def parent_replaced(self, parent):
+                super().parent_replaced(parent)
+                self.Pool[self.Slot] = self.Best
+
+        def fnCreate():
+            genes = [random.choice(self.geneset) for _ in self.target]
+            pool.append((get_fitness(genes, self.target), tuple(genes)))
+            return genes
+
+        self.geneset = "ab"
+        self.target = "abbabaabab"
+        # no retries leaves duplicates for the age check to keep out
+        for mutateInPlace, duplicateRetries in [(False, 3), (True, 3),
+                                                (True, 0)]:
+            pool = []
+            stats = PoolStats(pool)
+            # the pool crowds around the target it never reaches
+            genetic.get_best(self.fnGetFitness, len(self.target),
+                             len(self.target) + 1, self.geneset,
+                             lambda candidate: None, custom_create=fnCreate,
+                             poolSize=poolSize, maxAge=5,
+                             budget=genetic.Budget(maxEvaluations=2000),
+                             seed=1, mutateInPlace=mutateInPlace,
+                             rejectDuplicates=True,
+                             duplicateRetries=duplicateRetries,
+                             instrumentation=genetic.Instrumentation(stats))
+            self.assertGreater(stats.Duplicates, 0)
+            self.assertEqual(poolSize, stats.PoolSize)
+            self.assertEqual(len(set(p[1] for p in pool)),
+                             stats.DistinctGenomes)
+
+    def test_display_interval(self):
+        shown = []
+        stats = genetic.Stats()
+        # the thread waits out the interval after the first display so the
+        # later improvements are coalesced
+        best = self.guess("Hello World!", display=lambda candidate:
+                          shown.append((candidate.Fitness,
+                                        ''.join(candidate.Genes))),
+                          instrumentation=genetic.Instrumentation(
+                              stats, displayInterval=60))
+        self.assertGreater(stats.Improvements, 2)
+        self.assertLessEqual(len(shown), 2)
+        # the final improvement is always shown before get_best returns
+        self.assertEqual((best.Fitness, "Hello World!"), shown[-1])
+
+    def test_display_interval_error(self):
+        calls = []
+
+        def fnDisplay(candidate):
+            calls.append(candidate)
+            raise ValueError("display failed")
+
+        with self.assertRaises(ValueError):
+            self.get_best(fnDisplay, budget=genetic.Budget(
+                maxEvaluations=300), instrumentation=genetic.Instrumentation(
+                displayInterval=0))
+        # the search is not interrupted and nothing more is shown
+        self.assertEqual(300, len(self.fitnesses))
+        self.assertEqual(1, len(calls))
+
+    def test_get_best_async(self):
+        running = 0
+        concurrent = []
+
+        async def fnGetFitness(genes):
+            nonlocal running
+            running += 1
+            concurrent.append(running)
+            await asyncio.sleep(0.001)
+            running -= 1
+            return get_fitness(genes, self.target)
+
+        self.target = "Hello World!"
+        best = asyncio.run(genetic.get_best_async(
+            fnGetFitness, len(self.target), len(self.target), self.geneset,
+            lambda candidate: None, concurrency=3))
+        self.assertEqual(self.target, ''.join(best.Genes))
+        self.assertEqual(3, max(concurrent))
+
+    def test_get_best_async_max_seconds(self):
+        async def fnGetFitness(genes):
+            await asyncio.sleep(0.001)
+            return get_fitness(genes, self.target)
+
+        startTime = time.time()
+        best = asyncio.run(genetic.get_best_async(
+            fnGetFitness, len(self.target), len(self.target), self.geneset,
+            lambda candidate: None, maxSeconds=0.2))
+        self.assertIsNotNone(best)
+        self.assertLess(time.time() - startTime, 1)
+
+    def test_get_best_async_cancel(self):
+        deadlines = []
+
+        async def fnGetFitness(genes, deadline):
+            deadlines.append(deadline)
+            await asyncio.sleep(0.001)
+            return get_fitness(genes, self.target)
+
+        async def fnCancel():
+            task = asyncio.ensure_future(genetic.get_best_async(
+                fnGetFitness, len(self.target), len(self.target),
+                self.geneset, lambda candidate: None))
+            await asyncio.sleep(0.1)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+
+        asyncio.run(fnCancel())
+        # the search was stopped through its deadline before returning
+        self.assertGreater(len(deadlines), 0)
+        self.assertTrue(deadlines[-1].is_expired())
+
+    def test_race(self):
+        def fnRun():
+            # with seed 1 only racers 0 and 3 draw below one half, the
+            # others would hold up the race
+            if random.random() > 0.5:
+                time.sleep(60)
+            return self.guess("Hello World!")
+
+        startTime = time.time()
+        result = genetic.race(fnRun, 4, optimalFitness=len("Hello World!"),
+                              seed=1)
+        self.assertLess(time.time() - startTime, 30)
+        self.assertEqual("Hello World!", ''.join(result.Best.Genes))
+        self.assertIn(result.Winner, [0, 3])
+        self.assertEqual(4, len(result.Seeds))
+        self.assertEqual(result.Seeds, genetic.race(
+            lambda: self.guess("Hello World!"), 4, seed=1).Seeds)
+
+    def test_race_error(self):
+        def fnRun():
+            raise ValueError("racer failed")
+
+        with self.assertRaises(RuntimeError) as context:
+            genetic.race(fnRun, 2)
+        self.assertIn("racer failed", str(context.exception))
+
+    def test_hill_climbing_workers(self):
+        def fnOptimizationFunction(maxLength):
+            # anything of at least 7 fits
+            return maxLength, maxLength >= 7
+
+        def fnIsImprovement(best, child):
+            return child[1] and child[0] < best[0]
+
+        def fnIsOptimal(child):
+            return child[0] == 7
+
+        results = []
+        for workers in [None, 3]:
+            shown = []
+            best = genetic.hill_climbing(
+                fnOptimizationFunction, fnIsImprovement, fnIsOptimal,
+                lambda best: best[0] - 1,
+                lambda best, featureValue: shown.append(featureValue), 12,
+                maxSeconds=30, workers=workers)
+            results.append((best, shown))
+        self.assertEqual((7, True), results[0][0])
+        self.assertEqual(results[0][0], results[1][0])
+        self.assertEqual([11, 10, 9, 8, 7], results[0][1])
+        # the workers try three feature values at once and skip ahead
+        self.assertEqual([9, 7], results[1][1])
+
+    def test_nested_deadline(self):
+        nested = []
+
+        def fnGetFitness(genes, deadline):
+            # the nested search never reaches its optimal fitness so only
+            # the outer deadline stops it
+            best = self.get_best(deadline=deadline)
+            nested.append(best)
+            return best.Fitness + get_fitness(genes, "Hello World!")
+
+        maxSeconds = 0.5
+        startTime = time.time()
+        genetic.get_best(fnGetFitness, 12, 1000, self.geneset,
+                         lambda candidate: None, maxSeconds=maxSeconds)
+        self.assertLess(time.time() - startTime, maxSeconds + 0.5)
+        self.assertGreater(len(nested), 0)
+
+    def test_max_evaluations(self):
+        self.get_best(budget=genetic.Budget(maxEvaluations=500), seed=1)
+        self.assertEqual(500, len(self.fitnesses))
+
+    def test_max_evaluations_custom_mutate_with_get_fitness(self):
+        def fnMutate(genes, get_fitness):
+            index = random.randrange(len(genes))
+            genes[index] = random.choice(self.geneset)
+            get_fitness(genes)
+
+        self.get_best(budget=genetic.Budget(maxEvaluations=500),
+                      custom_mutate=fnMutate, seed=1)
+        self.assertEqual(500, len(self.fitnesses))
+
+    def test_max_generations(self):
+        self.get_best(budget=genetic.Budget(maxGenerations=30), poolSize=4,
+                      seed=1)
+        # the initial pool plus one child per parent per generation
+        self.assertEqual(4 + 30 * 4, len(self.fitnesses))
+
+    def test_max_generations_generational(self):
+        self.get_best(budget=genetic.Budget(maxGenerations=7),
+                      generational=genetic.Generational(), poolSize=10,
+                      seed=1)
+        # the initial pool plus two offspring per parent per generation
+        self.assertEqual(10 + 7 * 20, len(self.fitnesses))
+
+    def test_max_stagnant_evaluations(self):
+        self.get_best(budget=genetic.Budget(maxStagnantEvaluations=300),
+                      poolSize=3, maxAge=5, seed=1)
+        best = max(self.fitnesses)
+        lastImprovement = self.fitnesses.index(best) + 1
+        self.assertEqual(300, len(self.fitnesses) - lastImprovement)
+
+    def test_budget_limits_below_1(self):
+        for limit in ["maxEvaluations", "maxGenerations",
+                      "maxStagnantEvaluations"]:
+            with self.assertRaises(ValueError):
+                genetic.Budget(**{limit: 0})
+
+    def test_restart_budgets(self):
+        self.assertEqual([1, 1, 2, 1, 1, 2, 4, 1, 1, 2, 1, 1, 2, 4, 8],
+                         [genetic._luby(i) for i in range(1, 16)])
+        budgets = genetic._get_restart_budgets(genetic.RestartPolicy.Luby,
+                                               10, 2)
+        self.assertEqual([10, 10, 20, 10, 10, 20, 40],
+                         [next(budgets) for _ in range(7)])
+        budgets = genetic._get_restart_budgets(
+            genetic.RestartPolicy.Geometric, 10, 1.5)
+        self.assertEqual([10, 15, 22, 33, 50],
+                         [next(budgets) for _ in range(5)])
+
+    def get_restart_events(self, **options):
+        events = []
+
+        def fnCreate():
+            events.append(genetic.Strategies.Create)
+            return [random.choice(self.geneset) for _ in self.target]
+
+        def fnMutate(genes):
+            events.append(genetic.Strategies.Mutate)
+            index = random.randrange(len(genes))
+            genes[index] = random.choice(self.geneset)
+
+        self.get_best(custom_create=fnCreate, custom_mutate=fnMutate,
+                      budget=genetic.Budget(maxEvaluations=3000), seed=1,
+                      **options)
+        # the last child may not have been scored
+        return list(zip(events, self.fitnesses))
+
+    def test_restart_after_stagnation(self):
+        events = self.get_restart_events(restarts=genetic.Restarts(
+            genetic.RestartPolicy.Luby, budget=20))
+        budgets = genetic._get_restart_budgets(genetic.RestartPolicy.Luby,
+                                               20, 2)
+        runBest = events[0][1]
+        stagnant = 0
+        budget = next(budgets)
+        restarts = 0
+        for strategy, fitness in events[1:]:
+            if strategy == genetic.Strategies.Create:
+                # the pool is replaced as soon as the budget is spent
+                self.assertEqual(budget, stagnant)
+                budget = next(budgets)
+                restarts += 1
+                runBest = fitness
+                stagnant = 0
+                continue
+            self.assertLess(stagnant, budget)
+            stagnant += 1
+            if fitness > runBest:
+                runBest = fitness
+                stagnant = 0
+        self.assertGreater(restarts, 2)
+
+    def test_restart_elites_seed_the_pool(self):
+        for elites, created in [(0, 2), (1, 1)]:
+            del self.fitnesses[:]
+            events = self.get_restart_events(poolSize=2,
+                                             restarts=genetic.Restarts(
+                                                 genetic.RestartPolicy
+                                                 .Geometric, budget=20,
+                                                 factor=1, elites=elites))
+            # consecutive creates fill the pool of each run
+            runs = [len(list(group)) for strategy, group in
+                    groupby(strategy for strategy, _ in events)
+                    if strategy == genetic.Strategies.Create]
+            self.assertEqual(2, runs[0])
+            self.assertGreater(len(runs), 3)
+            # the best parent of the last run takes the other slot
+            self.assertEqual([created] * (len(runs) - 2), runs[1:-1])
+
+    def test_resume_from_checkpoint(self):
+        handle, fileName = tempfile.mkstemp()
+        os.close(handle)
+        self.addCleanup(os.remove, fileName)
+        traces = []
+        for checkpoints in [genetic.Checkpoints(fileName, interval=1e9),
+                            genetic.Checkpoints(resumeFrom=fileName)]:
+            trace = []
+            # the checkpoint is due once, right after the pool is created
+            self.get_best(lambda candidate: trace.append(
+                (candidate.Fitness, ''.join(candidate.Genes))),
+                poolSize=5, maxAge=30, seed=7,
+                budget=genetic.Budget(maxEvaluations=5000),
+                checkpoints=checkpoints)
+            traces.append(trace)
+        uninterrupted, resumed = traces
+        self.assertGreater(len(resumed), 1)
+        self.assertEqual(uninterrupted[-len(resumed):], resumed)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -16,6 +16,7 @@
 # permissions and limitations under the License.
 
 import datetime
+import os
 import random
 import unittest
 from functools import partial
@@ -341,6 +342,88 @@ class TicTacToeTests(unittest.TestCase):
         genetic.tournament(fnCreate, fnCrossover, play1on1, fnDisplay,
                            fnSortKey, 13)
 
+    def test_tornament_swiss(self):
+        cache = genetic.FitnessCache(1000, lambda players: (
+            tuple(players[0]), tuple(players[1])))
+        self.play_tournament(schedule=genetic.Schedule.Swiss,
+                             resultCache=cache)
+        # 10 players, 3 rounds of 5 pairings each played both ways
+        self.assertEqual(5 * 30, cache.Hits + cache.Misses)
+
+    def test_tornament_sampled(self):
+        cache = genetic.FitnessCache(1000, lambda players: (
+            tuple(players[0]), tuple(players[1])))
+        self.play_tournament(schedule=genetic.Schedule.Sampled,
+                             resultCache=cache)
+        self.assertEqual(5 * 30, cache.Hits + cache.Misses)
+
+    def test_tornament_workers(self):
+        expected = self.play_tournament(seed=5)
+        best = self.play_tournament(workers=2, seed=5)
+        self.assertEqual([str(rule) for rule in expected],
+                         [str(rule) for rule in best])
+
+    def test_tornament_result_cache(self):
+        games = [0]
+
+        def fnCompete(xGenes, oGenes):
+            games[0] += 1
+            return play1on1(xGenes, oGenes)
+
+        cache = genetic.FitnessCache(1000, lambda players: (
+            tuple(players[0]), tuple(players[1])))
+        self.play_tournament(resultCache=cache, compete=fnCompete)
+        # surviving parents replay their games against each other
+        self.assertGreater(cache.Hits, 0)
+        self.assertEqual(cache.Misses, games[0])
+        self.assertEqual(5 * 10 * 9, cache.Hits + cache.Misses)
+
+    def play_tournament(self, compete=play1on1, **options):
+        geneset = create_geneset()
+        mutationRoundCounts = [1]
+        mutationOperators = [
+            partial(mutate_add, geneset=geneset),
+            partial(mutate_replace, geneset=geneset),
+            mutate_remove,
+            mutate_swap_adjacent,
+            mutate_move,
+        ]
+
+        def fnMutate(genes):
+            mutate(genes, lambda x: 0, mutationOperators, mutationRoundCounts)
+
+        def fnCrossover(parent, donor):
+            child = parent[0:int(len(parent) / 2)] + \
+                    donor[int(len(donor) / 2):]
+            fnMutate(child)
+            return child
+
+        def fnCreate():
+            return random.sample(geneset, random.randrange(10, 20))
+
+        def fnSortKey(genes, wins, ties, losses):
+            return -1000 * losses - ties + 1 / len(genes)
+
+        return genetic.tournament(fnCreate, fnCrossover, compete,
+                                  lambda *args: None, fnSortKey, 3,
+                                  max_generations=5, **options)
+
+    def test_benchmark(self):
+        # results are only written when BENCHMARK_DIR is set, a run's
+        # benchmark.json kept there as baseline.json is checked against
+        # later runs
+        directory = os.environ.get("BENCHMARK_DIR")
+        resultsFile = baselineFile = None
+        if directory is not None:
+            resultsFile = os.path.join(directory, "benchmark.json")
+            baselineFile = os.path.join(directory, "baseline.json")
+            if not os.path.exists(baselineFile):
+                baselineFile = None
+        results = genetic.Benchmark.run(self.test_perfect_knowledge,
+                                        resultsFile=resultsFile,
+                                        baselineFile=baselineFile)
+        self.assertFalse(results.get("regressed", False))
+
 
 class ContentType:
     Empty = 'EMPTY'